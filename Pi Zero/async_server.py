@@ -0,0 +1,258 @@
+import time, json, asyncio
+
+import zmq.asyncio
+from zmq import ROUTER
+
+from server import Server
+from protocol import SNAPSHOT, GOVERNOR, TELEMETRY, GRASP, LOOP, CLIENTS, BUS, pack_telemetry
+from bus_arbiter import TELEMETRY as TELEMETRY_PRIORITY
+
+
+TELEMETRY_PERIOD = 0.05     # Replies reuse the telemetry read less than this many seconds ago (no control loop).
+ACCOUNT_PERIOD   = 2.0      # Seconds between two publications of the client accounts.
+CLIENT_TIMEOUT   = 30.0     # Clients silent for longer are dropped from the accounts.
+
+
+class Client_Account():
+    """Requests and time used by one client (a ROUTER identity), in total and since the last report().
+
+    Amounts: "requests", "reads", "writes", "snapshots", plus seconds of "bus" (commands and telemetry
+    reads run on the Controller), "camera" (snapshots) and "queue" (writes waiting for their turn).
+    """
+
+    FIELDS = ("requests", "reads", "writes", "snapshots", "bus", "camera", "queue")
+
+    def __init__(self, address:str):
+        self.address    = address
+        self.total      = dict.fromkeys(self.FIELDS, 0)
+        self.window     = dict.fromkeys(self.FIELDS, 0)
+        self.last_seen  = time.time()
+
+    def add(self, **amounts):
+        for field, amount in amounts.items():
+            self.total[field] += amount
+            self.window[field] += amount
+
+    def report(self, elapsed:float) -> dict:
+        "Rates over the last 'elapsed' seconds (bus and camera as a share of that time), then restarts the window."
+        window, elapsed = self.window, max(elapsed, 1e-6)
+        report = {"address": self.address, "rate": round(window["requests"] / elapsed, 1),
+                  "bus_share": round(window["bus"] / elapsed, 3), "camera_share": round(window["camera"] / elapsed, 3),
+                  "queue_mean": round(window["queue"] / max(window["writes"], 1) * 1e3, 2),
+                  "total": {field: round(amount, 3) for field, amount in self.total.items()}}
+        self.window = dict.fromkeys(self.FIELDS, 0)
+        return report
+
+
+class Async_Server(Server):
+    """Server whose command channel is run by an asyncio event loop (zmq.asyncio), so several clients
+    (GUIs, loggers, test scripts) can use the hand at once.
+
+    Requests are read as they come, from any number of REQ or DEALER clients:
+      - read-only ones (getters, telemetry, snapshot, governor, loop and clients) are answered
+        concurrently, on their own task.
+      - those that change the hand (setters, grasps...) go through a single queue and run one at a
+        time, in the order they arrived.
+    A getter may thus overtake a setter sent before it. Calls that use the bus run on a worker thread
+    as Bus_Arbiter transactions, the event loop never waits for the bus or the camera.
+
+    Each client has a Client_Account of the bus and camera time it used, published every
+    ACCOUNT_PERIOD seconds as {"clients": {name: report}} and returned by the "clients" command.
+    The Bus_Arbiter statistics go out with them as {"bus": stats} (and answer the "bus" command).
+    Video and events are published as by Server (from their threads).
+    """
+
+    def command_socket(self, context, port:int):
+        socket = zmq.asyncio.Context.shadow(context).socket(ROUTER)
+        socket.bind(f"tcp://*:{port}")
+        return socket
+
+    async def serve(self, cam, governor, dispatcher, grasps, bus, loop=None):
+        """Serves the commands until cancelled.
+
+        Arguments:
+          cam:        camera taking the snapshots.
+          governor:   Quality_Governor fed with the preview frame latency reported by the clients.
+          dispatcher: Dispatcher running the controller commands.
+          grasps:     Grasp_Engine running the grasp macros.
+          bus:        Bus_Arbiter of the Controller's bus, for the telemetry reads.
+          loop:       Control_Loop serving goals and state, None if the commands use the bus.
+        """
+        self.cam        = cam
+        self.governor   = governor
+        self.dispatcher = dispatcher
+        self.grasps     = grasps
+        self.bus        = bus
+        self.loop       = loop
+
+        self.writes         = asyncio.Queue()   # (envelope, command, account, time queued)
+        self.camera_lock    = asyncio.Lock()
+        self.accounts       = {}                # identity -> Client_Account
+        self.reported       = time.time()
+        self.telemetry, self.telemetry_at = None, 0.0
+        self.preview_task   = None              # Governor change being applied to the camera.
+        tasks = {asyncio.create_task(self.run_writes()), asyncio.create_task(self.publish_accounts())}
+
+        try:
+            while True:
+                frames = await self.socket.recv_multipart(copy=False)
+                request = self.parse_request([frame.bytes for frame in frames])
+                if request is None:
+                    print("[!]: Request without an envelope delimiter dropped")
+                    continue
+
+                envelope, command, stats = request
+                account = self.account(envelope[0], frames[-1])
+                account.add(requests=1)
+
+                # Reports arriving while the camera is being reconfigured are dropped: they would
+                # measure the reconfiguration, and the governor must not move on from settings
+                # the camera does not have yet.
+                if stats and "age" in stats and (self.preview_task is None or self.preview_task.done()):
+                    preview = governor.update(stats["age"], stats.get("decode", 0.0))
+                    if preview:
+                        self.preview_task = asyncio.create_task(self.set_preview(*preview))
+                        tasks.add(self.preview_task)
+                        self.preview_task.add_done_callback(tasks.discard)
+
+                if self.is_write(command):
+                    self.writes.put_nowait((envelope, command, account, time.perf_counter()))
+                else:
+                    task = asyncio.create_task(self.run_read(envelope, command, account))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def set_preview(self, quality:int, size:tuple):
+        "Applies a governor change on a worker thread, never during a snapshot."
+        try:
+            async with self.camera_lock:
+                await asyncio.to_thread(self.cam.set_preview, quality, size)
+        except Exception as e:
+            print(f"[!]: Preview change failed: {e}")
+
+    def account(self, identity:bytes, frame) -> Client_Account:
+        if identity not in self.accounts:
+            address = frame.get("Peer-Address")
+            self.accounts[identity] = Client_Account(address)
+            print(f"[i]: Client {address} ({identity.hex()}) connected")
+
+        account = self.accounts[identity]
+        account.last_seen = time.time()
+        return account
+
+    def is_write(self, command) -> bool:
+        "True for the commands that change the hand (or may), which run one at a time from the queue."
+        if command in (SNAPSHOT, GOVERNOR, TELEMETRY, LOOP, CLIENTS, BUS):
+            return False
+        if isinstance(command, str) and command.startswith(GRASP + " "):
+            return True
+
+        name = self.dispatcher.name(command)
+        return name is None or not name.startswith("get_")
+
+    async def run_command(self, command, account:Client_Account) -> str:
+        "Runs a controller command, on a worker thread unless the control loop serves it."
+        name = self.dispatcher.name(command)
+        if self.loop is not None and name in self.loop.COMMANDS:
+            return self.dispatcher.run(command)
+
+        start = time.perf_counter()
+        result = await asyncio.to_thread(self.dispatcher.run, command)
+        account.add(bus=time.perf_counter() - start)
+        return result
+
+    async def run_read(self, envelope:list, command, account:Client_Account):
+        start = time.perf_counter()
+        if command == SNAPSHOT:
+            async with self.camera_lock:
+                img_data = await asyncio.to_thread(self.cam.get_snapshot)
+            cam_t = time.perf_counter() - start
+            account.add(snapshots=1, camera=cam_t)
+
+            msg = json.dumps({"msg": f"[#]: Snapshot {len(img_data)/1024:.1f} KB (cam_t: {cam_t:.3f})"}).encode()
+            await self.socket.send_multipart(envelope + [msg, img_data], copy=False)
+            return
+
+        account.add(reads=1)
+        if command == GOVERNOR:
+            result = f"[#]: {self.governor.settings()}"
+        elif command == TELEMETRY:
+            result, self.telemetry_at = "[#]: Telemetry", 0.0
+        elif command == LOOP:
+            result = f"[#]: {self.loop.stats() if self.loop else 'No control loop'}"
+        elif command == CLIENTS:
+            result = f"[#]: {self.report()}"
+        elif command == BUS:
+            result = f"[#]: {self.bus.stats()}"
+        else:
+            result = await self.run_command(command, account)
+
+        await self.reply(envelope, result, start, account)
+
+    async def run_writes(self):
+        "Runs the queued commands one at a time."
+        while True:
+            envelope, command, account, queued = await self.writes.get()
+            start = time.perf_counter()
+            account.add(writes=1, queue=start - queued)
+
+            if isinstance(command, str) and command.startswith(GRASP + " "):
+                result = self.run_grasp(command[len(GRASP) + 1:].strip())
+            else:
+                result = await self.run_command(command, account)
+
+            await self.reply(envelope, result, start, account)
+
+    def run_grasp(self, name:str) -> str:
+        if name == "stop":
+            self.grasps.cancel()
+            return "[#]: Grasp stopped"
+        if name in self.grasps.grasps:
+            return f"[#]: Grasp '{name}' started (run {self.grasps.start(name)})"
+        return f"[!]: Unknown grasp '{name}', use one of {list(self.grasps.grasps)}"
+
+    async def reply(self, envelope:list, result, start:float, account:Client_Account):
+        "Answers a request with its result and the telemetry (see protocol.pack_telemetry)."
+        eval_t = time.perf_counter() - start
+
+        if self.loop is not None:
+            self.telemetry = pack_telemetry(self.loop.get_state())
+        elif time.time() - self.telemetry_at > TELEMETRY_PERIOD:
+            # One Sync Read of the mapped registers, shared by the replies of the next TELEMETRY_PERIOD.
+            self.telemetry_at = time.time()
+            read_start = time.perf_counter()
+            self.telemetry = await asyncio.to_thread(self.read_telemetry)
+            account.add(bus=time.perf_counter() - read_start)
+
+        frames = envelope + [f"{result} (eval_t: {eval_t:.3f} q: {self.governor.quality})".encode()]
+        if self.telemetry:
+            frames.append(self.telemetry)
+        await self.socket.send_multipart(frames)
+
+    def read_telemetry(self) -> bytes:
+        "Packs a state read shared with the other readers, keeps the last telemetry if the bus is too busy."
+        try:
+            return pack_telemetry(self.bus.get_state(priority=TELEMETRY_PRIORITY, deadline=TELEMETRY_PERIOD))
+        except TimeoutError:
+            return self.telemetry
+
+    def report(self) -> dict:
+        "Reports of the client accounts since the last one, dropping the clients silent for CLIENT_TIMEOUT."
+        now = time.time()
+        for identity in [identity for identity, account in self.accounts.items() if now - account.last_seen > CLIENT_TIMEOUT]:
+            print(f"[i]: Client {self.accounts[identity].address} ({identity.hex()}) gone")
+            del self.accounts[identity]
+
+        elapsed, self.reported = now - self.reported, now
+        return {identity.hex(): account.report(elapsed) for identity, account in self.accounts.items()}
+
+    async def publish_accounts(self):
+        while True:
+            await asyncio.sleep(ACCOUNT_PERIOD)
+            if self.accounts:
+                self.publish_event({"clients": self.report()})
+            self.publish_event({"bus": self.bus.stats()})
+            self.bus.reset_stats()
@@ -0,0 +1,40 @@
+import os, time, tempfile
+
+from controller import Controller
+import controller
+from sim_bus import Simulated_Port
+
+
+class Boot_Controller(Controller):
+    "Controller remembering whether find_motors() could use the saved inventory."
+
+    def check_inventory(self):
+        ids = super().check_inventory()
+        self.inventory_used = bool(ids)
+        return ids
+
+
+if __name__ == "__main__":
+    BOOTS = 3
+
+    print(f"[#]: Controller start up on the simulated bus, {BOOTS} boots sharing one inventory file")
+    print(f"{'bus':<20}{'boot':>6}{'ms':>8}  {'motors found by'}")
+
+    failed = False
+    for name, fast_sync_read in (("fast sync read", True), ("regular sync read", False)):
+        Boot_Controller.INVENTORY_FILE = os.path.join(tempfile.mkdtemp(), "motor_inventory.json")
+
+        for boot in range(BOOTS):
+            port = Simulated_Port(5, fast_sync_read=fast_sync_read)
+            controller.PortHandler = lambda name: port
+
+            start = time.perf_counter()
+            ctl = Boot_Controller(5, info=False, direction="none")
+            elapsed = (time.perf_counter() - start) * 1e3
+
+            print(f"{name:<20}{boot:>6}{elapsed:>8.1f}  {'inventory' if ctl.inventory_used else 'scan'}")
+            if boot > 0 and not ctl.inventory_used:
+                print(f"[!]: Boot {boot} on a {name} bus did not use the saved inventory")
+                failed = True
+
+    print("[!]: Inventory check failed" if failed else "[i]: Every boot after the first used the saved inventory")
@@ -0,0 +1,59 @@
+import time
+
+from dispatcher import Dispatcher, parse_call
+from protocol import COMMANDS, encode_command
+
+
+class Null_Controller():
+    "Controller with every dispatched method and no bus behind them: only the server side command cost is left."
+
+    def __init__(self):
+        for name, arguments, _ in COMMANDS.values():
+            if arguments:
+                setattr(self, name, lambda goals, ids=None: ids)
+            else:
+                setattr(self, name, lambda ids=None: [0, 0, 0, 0, 0])
+
+
+def eval_command(ctl, command:str):
+    "The former zero_main.do_command: the text command is parsed and compiled on every request."
+    return eval(f"ctl.{command}")
+
+
+def measure(run, commands) -> float:
+    "Returns the microseconds per command of run(command) over 'commands'."
+    start = time.perf_counter()
+    for command in commands:
+        run(command)
+    return (time.perf_counter() - start) / len(commands) * 1e6
+
+
+if __name__ == "__main__":
+    N = 20000
+
+    ctl = Null_Controller()
+    dispatcher = Dispatcher(ctl)
+
+    # Status polls and pregrasps repeat the same command, slider moves send a new goal every time.
+    workloads = {
+        "get_motor_position (status poll)": (["get_motor_position()"] * N,
+                                             [encode_command("get_motor_position")] * N),
+        "set_motor_position (slider)":      ([f"set_motor_position({i % 800 - 200}, [1])" for i in range(N)],
+                                             [encode_command("set_motor_position", i % 800 - 200, [1]) for i in range(N)]),
+        "set_motor_position (ids=)":        ([f"set_motor_position({i % 800 - 200}, ids=[1])" for i in range(N)],
+                                             [encode_command("set_motor_position", i % 800 - 200, [1]) for i in range(N)]),
+        "set_sync_motor_pwm (pregrasp)":    (["set_sync_motor_pwm([35, 20, -40, 20, 20], [0, 4, 1, 2, 3])"] * N,
+                                             [encode_command("set_sync_motor_pwm", [35, 20, -40, 20, 20], [0, 4, 1, 2, 3])] * N),
+    }
+
+    print(f"[#]: Server side cost per command, {N} commands, no bus")
+    print(f"{'command':<36}{'eval us':>10}{'text us':>10}{'binary us':>11}{'text B':>8}{'binary B':>10}")
+
+    for name, (texts, binaries) in workloads.items():
+        parse_call.cache_clear()
+        eval_us = measure(lambda command: eval_command(ctl, command), texts)
+        text_us = measure(dispatcher.run, texts)
+        binary_us = measure(dispatcher.run, binaries)
+        print(f"{name:<36}{eval_us:>10.1f}{text_us:>10.1f}{binary_us:>11.1f}{len(texts[-1]):>8}{len(binaries[-1]):>10}")
+
+    print("[i]: text reads numeric calls (keywords too) as JSON, the others (strings, names...) through ast with the parses cached.")
@@ -0,0 +1,41 @@
+import os, time, tempfile
+
+from controller import Controller, Motor
+import controller
+from sim_bus import Simulated_Port
+
+
+def per_read(ctl, port, address, length, n):
+    "Returns the ms per read and the status packets the motors sent per read."
+    replies = port.ser.replies
+    start = time.perf_counter()
+    for _ in range(n):
+        ctl.sync_read(address, length)
+    return (time.perf_counter() - start) / n * 1e3, (port.ser.replies - replies) / n
+
+
+if __name__ == "__main__":
+    N = 200
+    windows = {
+        "present position":     (Motor.ADDR_MX_PRESENT_POSITION, 4),
+        "snapshot window":      (Controller.SNAPSHOT_ADDR, Controller.SNAPSHOT_LAYOUT.size),
+    }
+
+    print(f"[#]: Sync Read vs Fast Sync Read on the simulated bus at 1 Mbaud, {N} reads each (ms/read)")
+    print(f"{'motors':<8}{'window':<20}{'sync':>10}{'fast':>10}{'packets':>10}")
+
+    for n_motors in (1, 3, 5):
+        # Each bus gets its own inventory, the robot's motor_inventory.json is left alone.
+        Controller.INVENTORY_FILE = os.path.join(tempfile.mkdtemp(), "motor_inventory.json")
+        port = Simulated_Port(n_motors)
+        controller.PortHandler = lambda name: port
+        ctl = Controller(n_motors, info=False, direction="none")
+
+        for name, (address, length) in windows.items():
+            ctl.fast_sync_read = False
+            sync, sync_packets = per_read(ctl, port, address, length, N)
+
+            ctl.fast_sync_read = True
+            fast, fast_packets = per_read(ctl, port, address, length, N)
+
+            print(f"{n_motors:<8}{name:<20}{sync:>10.3f}{fast:>10.3f}{f'{sync_packets:g} -> {fast_packets:g}':>10}")
@@ -0,0 +1,91 @@
+import io, time, tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from encoder import JPEG_Encoder
+
+
+class Synthetic_Camera():
+    "Moving test pattern laid out like picamera2's mapped capture buffers (padded rows, I420 planes)."
+
+    def __init__(self, format="BGR888", size=(640,480), stride_pad=64):
+        self.format = format
+        self.size   = size
+        self.n      = 0
+
+        width, height = size
+        if format == "YUV420":
+            stride = width + stride_pad
+            self.buffer = np.zeros((height*3//2, stride), np.uint8)
+        else:
+            stride = width + stride_pad // 3
+            self.buffer = np.zeros((height, stride, 3), np.uint8)
+
+    def mapped_array(self):
+        "Next frame, as the view MappedArray gives over the capture buffer (no copy)."
+        width, height = self.size
+        self.n += 1
+
+        x = (np.arange(width, dtype=np.uint16) + 4*self.n) % 256
+        y = np.arange(height, dtype=np.uint16)[:, None]
+        if self.format == "YUV420":
+            self.buffer[:height, :width] = (x + y) % 256
+            self.buffer[height:] = 128
+        else:
+            self.buffer[:, :width, 0] = x
+            self.buffer[:, :width, 1] = y % 256
+            self.buffer[:, :width, 2] = (x + y) % 256
+
+        return self.buffer
+
+
+def capture_file_pil(frame, size, quality):
+    """What capture_file(BytesIO, format='jpeg') does with a BGR888 frame: copy it out of the capture
+    buffer (capture_array), build a PIL image, save it and copy the JPEG out of the BytesIO."""
+    width, height = size
+    buffer = io.BytesIO()
+    Image.fromarray(np.array(frame[:height, :width])[:, :, ::-1]).save(buffer, format="jpeg", quality=quality)
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def measure(cam, encode, n):
+    "Returns (ms per frame, Python-traced KB allocated per frame at peak, JPEG KB) of encode(frame)."
+    encode(cam.mapped_array())
+    tracemalloc.start()
+    peak, elapsed = 0, 0.0
+    for _ in range(n):
+        frame = cam.mapped_array()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        jpeg = encode(frame)
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return elapsed / n * 1e3, peak / 1024, len(jpeg) / 1024
+
+
+if __name__ == "__main__":
+    N = 100
+    QUALITY = 50
+
+    if not JPEG_Encoder.available():
+        raise SystemExit("[!]: simplejpeg is not installed")
+
+    print(f"[#]: JPEG encoding of a synthetic 640x480 camera, {N} frames, quality {QUALITY}")
+    print(f"{'path':<34}{'ms/frame':>10}{'KB alloc':>10}{'KB jpeg':>10}")
+
+    bgr, yuv = Synthetic_Camera("BGR888"), Synthetic_Camera("YUV420")
+    rows = {
+        "BGR888 capture_file + PIL":     (bgr, lambda frame: capture_file_pil(frame, bgr.size, QUALITY)),
+        "BGR888 simplejpeg from buffer": (bgr, JPEG_Encoder("BGR888", bgr.size, QUALITY).encode),
+        "YUV420 simplejpeg from buffer": (yuv, JPEG_Encoder("YUV420", yuv.size, QUALITY).encode),
+    }
+
+    for name, (cam, encode) in rows.items():
+        ms, alloc, size = measure(cam, encode, N)
+        print(f"{name:<34}{ms:>10.2f}{alloc:>10.0f}{size:>10.1f}")
+
+    print("[i]: KB alloc only counts memory traced by Python (numpy, bytes), not PIL's or libjpeg's internal buffers.")
@@ -0,0 +1,42 @@
+import os, time, tempfile
+
+from controller import Controller, Motor
+import controller
+from sim_bus import Simulated_Port
+
+
+def cpu_usage(fn, n):
+    "Returns (wall ms per call, CPU time / wall time) of calling fn() n times."
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(n):
+        fn()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return wall / n * 1e3, cpu / wall
+
+
+if __name__ == "__main__":
+    N = 200
+    Controller.INVENTORY_FILE = os.path.join(tempfile.mkdtemp(), "motor_inventory.json")     # Leave the robot's inventory alone.
+    port = Simulated_Port(5, return_delay=500e-6)
+    controller.PortHandler = lambda name: port
+    ctl = Controller(5, info=False, direction="none")
+
+    ph = ctl.packetHandler
+    calls = {
+        "sync read position":   (lambda: ctl.sync_read(Motor.ADDR_MX_PRESENT_POSITION, 4), N),
+        "get_motor_position":   (lambda: ctl.get_motor_position(), N // 5),
+        "read, no reply (ID 99)": (lambda: ph.read4ByteTxRx(ctl.portHandler, 99, Motor.ADDR_MX_PRESENT_POSITION), N // 10),
+        "broadcast ping":       (lambda: ph.broadcastPing(ctl.portHandler), 2),
+    }
+
+    print("[#]: Receive loop on the simulated bus (500 us return delay): polling vs select()")
+    print(f"{'call':<24}{'poll ms':>10}{'poll CPU':>10}{'select ms':>11}{'select CPU':>12}")
+
+    for name, (fn, n) in calls.items():
+        ph.select_rx = False
+        poll_ms, poll_cpu = cpu_usage(fn, n)
+
+        ph.select_rx = True
+        select_ms, select_cpu = cpu_usage(fn, n)
+
+        print(f"{name:<24}{poll_ms:>10.2f}{poll_cpu:>10.0%}{select_ms:>11.2f}{select_cpu:>12.0%}")
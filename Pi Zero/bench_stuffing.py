@@ -0,0 +1,98 @@
+import time
+
+from dynamixel_sdk.robotis_def import *
+from packet_handler_modified_p_2 import Protocol2PacketHandler as Packet_Handler
+from packet_handler_modified_p_2 import TXPACKET_MAX_LEN, PKT_LENGTH_L, PKT_LENGTH_H, PKT_INSTRUCTION
+
+
+def legacy_add_stuffing(packet):
+    "Per-index stuffing as it was before, kept only as the benchmark baseline."
+    packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
+    packet_length_out = packet_length_in
+
+    temp = [0] * TXPACKET_MAX_LEN
+    temp[0: PKT_LENGTH_H + 1] = packet[0: PKT_LENGTH_H + 1]
+
+    index = PKT_INSTRUCTION
+    for i in range(0, packet_length_in - 2):
+        temp[index] = packet[i + PKT_INSTRUCTION]
+        index = index + 1
+        if packet[i + PKT_INSTRUCTION] == 0xFD and packet[i + PKT_INSTRUCTION - 1] == 0xFF and packet[i + PKT_INSTRUCTION - 2] == 0xFF:
+            temp[index] = 0xFD
+            index = index + 1
+            packet_length_out = packet_length_out + 1
+
+    temp[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
+    temp[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
+    index = index + 2
+
+    if packet_length_in != packet_length_out:
+        packet = [0] * index
+
+    packet[0: index] = temp[0: index]
+    packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
+    packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
+
+    return packet
+
+
+def legacy_remove_stuffing(packet):
+    "Per-index unstuffing as it was before, kept only as the benchmark baseline."
+    packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
+    packet_length_out = packet_length_in
+
+    index = PKT_INSTRUCTION
+    for i in range(0, (packet_length_in - 2)):
+        if (packet[i + PKT_INSTRUCTION] == 0xFD) and (packet[i + PKT_INSTRUCTION + 1] == 0xFD) and (
+                packet[i + PKT_INSTRUCTION - 1] == 0xFF) and (packet[i + PKT_INSTRUCTION - 2] == 0xFF):
+            packet_length_out = packet_length_out - 1
+        else:
+            packet[index] = packet[i + PKT_INSTRUCTION]
+            index += 1
+
+    packet[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
+    packet[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
+    packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
+    packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
+
+    return packet
+
+
+def make_packet(instruction, params):
+    packet = [0xFF, 0xFF, 0xFD, 0x00, BROADCAST_ID, 0, 0, instruction] + list(params) + [0, 0]
+    packet[PKT_LENGTH_L] = DXL_LOBYTE(len(packet) - 7)
+    packet[PKT_LENGTH_H] = DXL_HIBYTE(len(packet) - 7)
+    return packet
+
+
+def per_packet_us(fn, packet, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(packet[:])
+    return (time.perf_counter() - start) / n * 1e6
+
+
+if __name__ == "__main__":
+    N = 20_000
+    ph = Packet_Handler(1_000_000)
+
+    packets = {
+        "write goal position":  make_packet(INST_WRITE, [116, 0, 0x10, 0x27, 0x00, 0x00]),
+        "sync write 5 motors":  make_packet(INST_SYNC_WRITE, [116, 0, 4, 0] + [b for id in range(5) for b in (id, 0x10, 0x27, 0x00, 0x00)]),
+        "status 21 bytes":      make_packet(INST_STATUS, [0x00] + list(range(21))),
+        "with FF FF FD":        make_packet(INST_WRITE, [116, 0, 0x00, 0xFF, 0xFF, 0xFD]),
+    }
+
+    print(f"[#]: Header stuffing, {N} packets each (us/packet)")
+    print(f"{'packet':<22}{'add old':>10}{'add new':>10}{'rm old':>10}{'rm new':>10}")
+
+    for name, packet in packets.items():
+        tx = bytearray(packet)
+        rx = bytes(ph.addStuffing(bytearray(packet)))
+
+        add_old = per_packet_us(legacy_add_stuffing, packet, N)
+        add_new = per_packet_us(ph.addStuffing, tx, N)
+        rm_old  = per_packet_us(legacy_remove_stuffing, list(rx), N)
+        rm_new  = per_packet_us(ph.removeStuffing, rx, N)
+
+        print(f"{name:<22}{add_old:>10.2f}{add_new:>10.2f}{rm_old:>10.2f}{rm_new:>10.2f}")
@@ -0,0 +1,213 @@
+import time, threading
+from math import inf
+from heapq import heappush, heappop, heapify
+from itertools import count
+from contextlib import contextmanager
+
+from numpy import isin
+
+
+# Priority classes, most urgent first.
+SAFETY      = 0     # Torque on/off.
+CONTROL     = 1     # Goals and modes (control loop ticks, grasp steps, setters).
+TELEMETRY   = 2     # State reads for the clients.
+DIAGNOSTICS = 3     # Everything else (scans, baud rate, turnaround...).
+CLASSES     = ("safety", "control", "telemetry", "diagnostics")
+
+TELEMETRY_METHODS = ("get_state", "snapshot", "get_torque", "get_mode", "get_motor_position", "get_load",
+                     "get_signed_load", "get_voltage", "get_sync_motor_position")
+
+
+def priority_of(name:str) -> int:
+    "Priority class of the Controller method 'name'."
+    if name in ("set_torque", "set_sync_torque"):
+        return SAFETY
+    if name in ("set_mode", "set_sync_mode", "switch_mode") or (name.startswith(("set_motor_", "set_sync_motor_")) and name != "set_motor_baudrate"):
+        return CONTROL
+    if name in TELEMETRY_METHODS:
+        return TELEMETRY
+    return DIAGNOSTICS
+
+
+class Read_Batch():
+    "get_state() calls served by one Sync Read, made by whichever of them is waiting when the bus is granted."
+
+    def __init__(self, entry:list):
+        self.entry      = entry     # Wait entry of the read (see Bus_Arbiter.enqueue).
+        self.members    = []        # (priority, deadline) of the callers still waiting for the bus
+        self.granted    = False
+        self.done       = False
+        self.state      = None
+        self.error      = None
+
+    def requeue(self):
+        "Gives the wait entry the most urgent priority and earliest deadline of the members."
+        self.entry[0] = min(priority for priority, _ in self.members)
+        self.entry[1] = min(deadline for _, deadline in self.members)
+
+
+class Bus_Arbiter():
+    """Owns the Controller (and its port) and grants the bus to one transaction at a time.
+
+    The Dynamixel SDK only guards the port with the 'is_using' flag, which is not atomic, and the
+    motor commands retry blindly on COMM_PORT_BUSY. Every thread using the bus (control loop,
+    grasps, commands, telemetry) now goes through transaction(), which waits its turn instead:
+    the bus goes to the waiting transaction of the most urgent class (SAFETY > CONTROL > TELEMETRY
+    > DIAGNOSTICS), the earliest deadline first within a class. Transactions run on the caller's
+    thread and are not pre-empted.
+
+    A transaction given a deadline raises TimeoutError if the bus could not be granted in time,
+    stale telemetry or a late control tick being worth less than none. get_state() calls waiting
+    at the same time share a single Sync Read of every motor.
+
+    stats() gives the transactions, queueing delay and bus utilization of each class.
+    """
+
+    def __init__(self, ctl):
+        self.ctl        = ctl
+        self.cond       = threading.Condition()
+        self.waiting    = []        # heap of wait entries [priority, deadline, seq, queued at]
+        self.owner      = None      # entry holding the bus
+        self.seq        = count()
+        self.batch      = None      # Read_Batch still waiting for the bus, joined by the next get_state()
+        self.reset_stats()
+
+    def enqueue(self, priority:int, deadline:float=None) -> list:
+        "Adds a wait entry (with self.cond held). 'deadline' is in seconds from now."
+        now = time.perf_counter()
+        entry = [priority, inf if deadline is None else now + deadline, next(self.seq), now]
+        heappush(self.waiting, entry)
+        return entry
+
+    def wait_turn(self, entry:list):
+        "Waits (with self.cond held) until 'entry' gets the bus, raises TimeoutError once past its deadline."
+        while self.owner is not None or self.waiting[0] is not entry:
+            timeout = entry[1] - time.perf_counter()
+            if timeout <= 0:
+                self.waiting.remove(entry)
+                heapify(self.waiting)
+                self.window[entry[0]]["missed"] += 1
+                self.cond.notify_all()      # Someone else may be first now.
+                raise TimeoutError(f"Bus not granted to a {CLASSES[entry[0]]} transaction in time")
+            self.cond.wait(None if timeout == inf else timeout)
+
+        heappop(self.waiting)
+        self.owner = entry
+        self.account(entry[0], time.perf_counter() - entry[3])
+
+    def release(self, entry:list, start:float):
+        with self.cond:
+            self.owner = None
+            self.window[entry[0]]["busy"] += time.perf_counter() - start
+            self.cond.notify_all()
+
+    @contextmanager
+    def transaction(self, priority:int=CONTROL, deadline:float=None):
+        """Holds the bus for the body of the with statement, which gets the Controller.
+
+        Arguments:
+          priority: SAFETY, CONTROL, TELEMETRY or DIAGNOSTICS.
+          deadline: seconds the transaction may wait for the bus, None to wait as long as needed.
+        """
+        with self.cond:
+            entry = self.enqueue(priority, deadline)
+            self.wait_turn(entry)
+
+        start = time.perf_counter()
+        try:
+            yield self.ctl
+        finally:
+            self.release(entry, start)
+
+    def get_state(self, ids:list[int]=None, priority:int=TELEMETRY, deadline:float=None):
+        """Controller.get_state() of 'ids', read in a transaction shared with every get_state() waiting
+        for the bus at the same time (one Sync Read of every motor serves them all).
+
+        The read is queued at the most urgent priority and earliest deadline of the callers still
+        waiting, and made by whichever of them is woken up once it gets the bus. Each caller waits for
+        the bus up to its own deadline only, then gets a TimeoutError and leaves the read to the others.
+        """
+        queued = time.perf_counter()
+        member = (priority, inf if deadline is None else queued + deadline)
+
+        with self.cond:
+            batch = self.batch
+            if batch is None:
+                batch = self.batch = Read_Batch(self.enqueue(priority, deadline))
+            batch.members.append(member)
+            batch.requeue()
+            heapify(self.waiting)
+
+            while not batch.granted:
+                if self.owner is None and self.waiting[0] is batch.entry:
+                    # This caller makes the read for the whole batch.
+                    heappop(self.waiting)
+                    self.owner, self.batch, batch.granted = batch.entry, None, True
+                    self.account(priority, time.perf_counter() - queued)
+                    break
+
+                timeout = member[1] - time.perf_counter()
+                if timeout <= 0:
+                    batch.members.remove(member)
+                    if batch.members:
+                        batch.requeue()
+                    else:
+                        self.waiting.remove(batch.entry)
+                        self.batch = None
+                    heapify(self.waiting)
+                    self.window[priority]["missed"] += 1
+                    self.cond.notify_all()      # Someone else may be first now.
+                    raise TimeoutError(f"Bus not granted to a {CLASSES[priority]} read in time")
+                self.cond.wait(None if timeout == inf else timeout)
+            else:
+                # Another caller got the bus for the batch, wait for its read.
+                self.cond.wait_for(lambda: batch.done)
+                self.account(priority, time.perf_counter() - queued, batched=True)
+                return self.batch_result(batch, ids)
+
+        start = time.perf_counter()
+        try:
+            batch.state = self.ctl.get_state()
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self.cond:
+                batch.done = True
+            self.release(batch.entry, start)
+
+        return self.batch_result(batch, ids)
+
+    @staticmethod
+    def batch_result(batch:Read_Batch, ids:list[int]):
+        if batch.error:
+            raise batch.error
+
+        state = batch.state
+        return state if ids is None else state[isin(state.id, ids)]
+
+    def account(self, priority:int, wait:float, batched=False):
+        "Counts a transaction that waited 'wait' seconds (with self.cond held)."
+        window = self.window[priority]
+        window["transactions"] += 1
+        window["batched"] += batched
+        window["wait_sum"] += wait
+        window["wait_max"] = max(window["wait_max"], wait)
+
+    def reset_stats(self):
+        self.window = [{"transactions": 0, "batched": 0, "missed": 0, "wait_sum": 0.0, "wait_max": 0.0, "busy": 0.0}
+                       for _ in CLASSES]
+        self.window_start = time.perf_counter()
+
+    def stats(self) -> dict:
+        """Per class since the last reset_stats(): transactions (batched ones served by another read),
+        deadlines missed, queueing delay (ms) and share of the time it held the bus."""
+        with self.cond:
+            elapsed = max(time.perf_counter() - self.window_start, 1e-6)
+            stats = {}
+            for name, window in zip(CLASSES, self.window):
+                n = max(window["transactions"], 1)
+                stats[name] = {"transactions": window["transactions"], "batched": window["batched"],
+                               "missed": window["missed"], "wait_mean": round(window["wait_sum"]/n*1e3, 3),
+                               "wait_max": round(window["wait_max"]*1e3, 3), "utilization": round(window["busy"]/elapsed, 3)}
+            stats["utilization"] = round(sum(window["busy"] for window in self.window)/elapsed, 3)
+            return stats
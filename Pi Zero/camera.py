@@ -1,43 +1,314 @@
-import time, io
-from PIL import Image
-from picamera2 import Picamera2 # type: ignore
+import time, io, threading, multiprocessing
+from picamera2 import Picamera2, MappedArray # type: ignore
+
+from encoder import JPEG_Encoder
+from frame_ring import Frame_Ring
 
 class Zero_Camera():
 
-    def __init__(self):
+    def __init__(self, format="BGR888", size=(640,480), quality=50, lores_size=(320,240), change_threshold=2.0, refresh=2.0):
+        """
+        Arguments:
+          change_threshold: mean absolute luma difference (0-255) below which continuous capture
+                            considers the scene unchanged and skips the frame.
+          refresh:          seconds after which a frame is encoded even if the scene did not change.
+        """
         self.picam2 = Picamera2()
-        self.set_camera_config() # "YUV420"
+        self.set_camera_config(format, size, quality, lores_size) # "YUV420"
 
         self.last_frame = None
         self.last_buffer_data = None
 
-    def set_camera_config(self, format="BGR888", size=(640,480), quality=50):
-        config = self.picam2.create_video_configuration()
+        # Static scene suppression: luma of the last encoded frame, every 8th pixel of every 8th row.
+        self.change_threshold = change_threshold
+        self.refresh = refresh
+        self.reference = None
+        self.encoded_at = 0.0
+
+        # Continuous capture: the thread fills the back slot and flips 'front' once a JPEG is complete.
+        self.frames = [(0, 0.0, None), (0, 0.0, None)]     # (seq, timestamp, jpeg) x 2
+        self.front = 0
+        self.new_frame = threading.Condition()
+        self.capture_thread = None
+        self.capturing = False
+
+    def set_camera_config(self, format="BGR888", size=(640,480), quality=50, lores_size=(320,240), warmup=1):
+        """Configures the 'main' stream and, if lores_size is given, a low resolution YUV420 'lores' stream.
+
+        With lores, the preview (get_buffer_data and continuous capture) is the lores stream and
+        full resolution JPEGs are only encoded by get_snapshot().
+        """
+        config = self.picam2.create_video_configuration(lores={"size": lores_size, "format": "YUV420"} if lores_size else None)
         config["main"]["size"]          = size
         config["main"]["format"]        = format
         self.picam2.options['quality']  = quality  # JPEG quality (0 - 100)
+        self.encoder = JPEG_Encoder(format, size, quality)
+
+        self.encoders = {"main": self.encoder}
+        if lores_size:
+            self.encoders["lores"] = JPEG_Encoder("YUV420", lores_size, quality)
+        self.preview = "lores" if lores_size else "main"
+
+        self.format, self.size, self.quality, self.lores_size = format, size, quality, lores_size
 
         self.picam2.configure(config)
         self.picam2.start()
 
-        time.sleep(1)
+        time.sleep(warmup)
         print("[#]: Camera Ready!")
 
+    def set_preview(self, quality=None, lores_size=None):
+        """Changes the JPEG quality and/or the lores preview size.
+
+        Quality applies from the next frame; a new preview size reconfigures (restarts) the camera.
+        """
+        if quality is not None:
+            self.quality = quality
+            self.picam2.options['quality'] = quality
+            for encoder in self.encoders.values():
+                encoder.quality = quality
+
+        if lores_size is not None and self.lores_size and tuple(lores_size) != tuple(self.lores_size):
+            capturing = self.capturing
+            self.stop_capture()
+            self.picam2.stop()
+            self.set_camera_config(self.format, self.size, self.quality, tuple(lores_size), warmup=0)
+            if capturing:
+                self.start_capture()
+
     def get_frame(self):
         self.last_frame = self.picam2.capture_array()
         return self.last_frame
 
     def get_buffer_data(self):
-        buffer = io.BytesIO()
-        self.picam2.capture_file(buffer, format='jpeg')
-        buffer.seek(0)
-        self.last_buffer_data = buffer.getvalue()
+        if self.capturing:
+            return self.get_latest()[2]
+
+        return self.capture_jpeg(self.preview)
+
+    def get_snapshot(self):
+        "Full resolution JPEG of the 'main' stream."
+        return self.capture_jpeg("main")
+
+    def capture_jpeg(self, stream="main", skip_unchanged=False):
+        """Captures and encodes one frame of 'stream'.
+
+        With skip_unchanged, returns None instead when the frame hardly differs from the last one
+        encoded (see changed()).
+        """
+        if not self.encoder.available():
+            # No simplejpeg: picamera2 copies the frame, converts it with PIL and saves it to a BytesIO.
+            buffer = io.BytesIO()
+            self.picam2.capture_file(buffer, name=stream, format='jpeg')
+            buffer.seek(0)
+            self.last_buffer_data = buffer.getvalue()
+
+            return self.last_buffer_data
+
+        # Encode straight from the capture buffer, the JPEG bytes are the only copy of the frame.
+        request = self.picam2.capture_request()
+        try:
+            with MappedArray(request, stream) as m:
+                if skip_unchanged and not self.changed(m.array, stream):
+                    return None
+                self.last_buffer_data = self.encoders[stream].encode(m.array)
+        finally:
+            request.release()
 
         return self.last_buffer_data
-    
-    def __del__(self):
+
+    def changed(self, array, stream) -> bool:
+        """Whether a raw frame differs from the last encoded one by more than change_threshold.
+
+        Compares the luma of every 8th pixel of every 8th row (Y plane for YUV420, green channel
+        otherwise); a changed frame becomes the new reference.
+        """
+        width, height = self.encoders[stream].size
+        if self.encoders[stream].format == "YUV420":
+            luma = array[:height:8, :width:8].astype("int16")
+        else:
+            luma = array[:height:8, :width:8, 1].astype("int16")
+
+        now = time.time()
+        if (self.reference is not None and self.reference.shape == luma.shape and now - self.encoded_at < self.refresh
+                and abs(luma - self.reference).mean() < self.change_threshold):
+            return False
+
+        self.reference = luma
+        self.encoded_at = now
+        return True
+
+    def start_capture(self):
+        """Starts encoding frames continuously in a background thread.
+
+        get_buffer_data() then returns the newest complete JPEG right away instead of capturing one.
+        """
+        if self.capturing:
+            return
+
+        self.capturing = True
+        self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+        self.capture_thread.start()
+
+        self.wait_frame(0, timeout=5)  # Don't hand out an empty frame.
+        print("[#]: Continuous capture started")
+
+    def stop_capture(self):
+        self.capturing = False
+        if self.capture_thread is not None:
+            self.capture_thread.join()
+            self.capture_thread = None
+
+    def capture_loop(self):
+        seq = self.frames[self.front][0]
+
+        while self.capturing:
+            try:
+                jpeg = self.capture_jpeg(self.preview, skip_unchanged=True)
+            except Exception as e:
+                print(f"[!]: Capture failed: {e}")
+                time.sleep(0.1)
+                continue
+
+            if jpeg is None:    # Static scene, keep the current frame and seq.
+                continue
+
+            seq += 1
+            back = 1 - self.front
+            self.frames[back] = (seq, time.time(), jpeg)
+
+            with self.new_frame:
+                self.front = back
+                self.new_frame.notify_all()
+
+    def get_latest(self):
+        """Returns the newest complete frame as (seq, timestamp, jpeg).
+
+        seq increases by one per captured frame (0 until the first one), timestamp is the time.time()
+        the frame finished encoding.
+        """
+        return self.frames[self.front]
+
+    def wait_frame(self, seq, timeout=None):
+        "Waits until a frame newer than 'seq' is available and returns it as get_latest() does."
+        with self.new_frame:
+            self.new_frame.wait_for(lambda: self.frames[self.front][0] > seq or not self.capturing, timeout)
+            return self.frames[self.front]
+
+    def close(self):
+        "Stops the continuous capture and the camera."
+        self.stop_capture()
         if self.picam2.started:
             self.picam2.stop()
+
+    def __del__(self):
+        self.close()
+
+
+def camera_process(ring_name, stop, control, format, size, quality, lores_size):
+    """Camera process: captures and encodes preview frames into the Frame_Ring 'ring_name' until 'stop'
+    is set. In between it serves requests from the 'control' pipe: None asks for a full resolution
+    snapshot (sent back), (quality, lores_size) changes the preview."""
+    ring = Frame_Ring(ring_name)
+    cam = Zero_Camera(format, size, quality, lores_size)
+
+    try:
+        while not stop.is_set():
+            try:
+                if control.poll():
+                    request = control.recv()
+                    if request is None:
+                        control.send_bytes(cam.get_snapshot())
+                    else:
+                        cam.set_preview(*request)
+
+                jpeg = cam.capture_jpeg(cam.preview, skip_unchanged=True)
+                if jpeg is not None:
+                    ring.write(jpeg, time.time())
+            except Exception as e:
+                print(f"[!]: Capture failed: {e}")
+                time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cam.close()
+        ring.close()
+
+
+class Zero_Camera_Process():
+    """Zero_Camera capturing and encoding in its own process, frames shared through a Frame_Ring.
+
+    Reads like a capturing Zero_Camera (get_buffer_data, get_latest, wait_frame), but JPEG encoding
+    runs on another core instead of holding this interpreter's GIL while the bus is being timed.
+    Frames are memoryviews into shared memory: they are not copied, and stay intact for the next
+    'slots' - 1 frames (see Frame_Ring).
+    """
+
+    def __init__(self, format="BGR888", size=(640,480), quality=50, lores_size=(320,240), slots=4):
+        self.ring = Frame_Ring(slots=slots)
+        self.stop = multiprocessing.Event()
+        self.control, control = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=camera_process, args=(self.ring.name, self.stop, control, format, size, quality, lores_size), daemon=True)
+        self.format, self.size, self.quality, self.lores_size = format, size, quality, lores_size
+        self.process.start()
+
+        if not self.wait_frame(0, timeout=10)[0]:
+            print("[!]: Camera process did not publish any frame")
+        else:
+            print("[#]: Camera process started")
+
+    def get_buffer_data(self):
+        return self.get_latest()[2]
+
+    def get_snapshot(self, timeout=2):
+        "Full resolution JPEG of the 'main' stream, encoded by the camera process on request."
+        while self.control.poll():      # Late answer to a request that timed out.
+            self.control.recv_bytes()
+
+        self.control.send(None)
+        if not self.control.poll(timeout):
+            print("[!]: Snapshot timed out")
+            return b""
+        return self.control.recv_bytes()
+
+    def set_preview(self, quality=None, lores_size=None):
+        "Changes the JPEG quality and/or the lores preview size (see Zero_Camera.set_preview)."
+        self.control.send((quality, lores_size))
+        if quality is not None:
+            self.quality = quality
+        if lores_size is not None and self.lores_size:
+            self.lores_size = tuple(lores_size)
+
+    def get_latest(self):
+        "Returns the newest frame as (seq, timestamp, jpeg memoryview)."
+        return self.ring.read()
+
+    def wait_frame(self, seq, timeout=None):
+        "Waits until a frame newer than 'seq' is available and returns it as get_latest() does."
+        deadline = None if timeout is None else time.time() + timeout
+        while self.ring.latest() <= seq and self.process.is_alive():
+            if deadline is not None and time.time() > deadline:
+                break
+            time.sleep(0.002)
+
+        return self.ring.read()
+
+    def close(self):
+        "Stops the camera process and releases the Frame_Ring."
+        if self.process.is_alive():
+            self.stop.set()
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+
+        self.ring.close()
+        try:
+            self.ring.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __del__(self):
+        self.close()
             
 
 if __name__ == "__main__":
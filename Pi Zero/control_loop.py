@@ -0,0 +1,215 @@
+import os, time, ctypes, threading
+
+from numpy import ndim, isin
+
+from bus_arbiter import CONTROL
+
+
+# Goal kind -> Controller method writing it to several motors with one Sync Write.
+GOALS = {
+    "position": "set_sync_motor_position",
+    "velocity": "set_sync_motor_velocity",
+    "pwm":      "set_sync_motor_pwm",
+}
+
+MCL_CURRENT = 1     # mlockall() flags (sys/mman.h)
+MCL_FUTURE  = 2
+
+
+class Control_Loop():
+    """Fixed rate control thread: every tick reads the state of every motor with one Sync Read and
+    writes the goals set since the previous tick with one Sync Write per goal kind.
+
+    Motor I/O then runs at 'rate' whatever the network does. Commands only update the goals (set_*
+    below, latest goal wins) and read the last state (get_*, get_state()), neither touches the bus.
+    The names match the Controller methods, so Dispatcher and Grasp_Engine use the loop for them
+    (see COMMANDS). Everything else still goes to the Controller through the Bus_Arbiter, from which
+    each tick is a CONTROL transaction: a tick that cannot get the bus within a period is skipped
+    (counted in "missed"), its goals go with the next one.
+
+    Timing statistics (stats()) are published every 'stats_period' seconds as {"loop": stats}.
+    """
+
+    # Controller methods served by the loop instead of the bus.
+    COMMANDS = ("set_motor_position", "set_motor_velocity", "set_motor_pwm",
+                "set_sync_motor_position", "set_sync_motor_velocity", "set_sync_motor_pwm",
+                "get_motor_position", "get_load", "get_signed_load", "get_torque", "get_mode", "get_voltage", "get_state")
+
+    def __init__(self, ctl, bus, rate=100, realtime=False, priority=50, cpu:int=None, lock_memory=False,
+                 publish=None, stats_period=1.0):
+        """
+        Arguments:
+          ctl:          Controller the loop reads and writes.
+          bus:          Bus_Arbiter of the Controller's bus.
+          rate:         ticks per second.
+          realtime:     run the thread as SCHED_FIFO 'priority'.
+          cpu:          CPU the thread is pinned to, None to let it move.
+          lock_memory:  with realtime, lock the whole process memory (mlockall), camera and zmq buffers
+                        included: only where the RAM can spare it.
+          publish:      called with {"loop": stats()} every 'stats_period' seconds.
+        """
+        self.ctl            = ctl
+        self.bus            = bus
+        self.period         = 1 / rate
+        self.realtime       = realtime
+        self.priority       = priority
+        self.cpu            = cpu
+        self.lock_memory    = lock_memory
+        self.publish        = publish
+        self.stats_period   = stats_period
+
+        self.goals          = {kind: {} for kind in GOALS}  # kind -> {id: goal} not written yet
+        self.goals_lock     = threading.Lock()
+
+        self.state = bus.get_state(priority=CONTROL)        # Last state read, replaced every tick.
+
+        self.ticks          = 0
+        self.overruns       = 0
+        self.missed         = 0     # Ticks skipped, the bus was not granted within a period.
+        self.reset_stats()
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def configure_thread(self):
+        "Applies CPU affinity and real-time scheduling to the calling (loop) thread, where allowed."
+        if self.cpu is not None:
+            try:
+                os.sched_setaffinity(0, {self.cpu})
+            except (AttributeError, OSError) as e:
+                print(f"[!]: Control loop not pinned to CPU {self.cpu}: {e}")
+
+        if not self.realtime:
+            return
+
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+        except (AttributeError, OSError) as e:
+            print(f"[!]: Control loop not SCHED_FIFO: {e}")
+
+        if not self.lock_memory:
+            return
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+            print(f"[!]: mlockall failed: {os.strerror(ctypes.get_errno())}")
+
+    def run(self):
+        self.configure_thread()
+        print(f"[i]: Control loop running at {1/self.period:.0f} Hz")
+
+        next_tick = time.perf_counter()
+        published = time.time()
+
+        while self.running:
+            start = time.perf_counter()
+            try:
+                self.tick()
+            except TimeoutError:
+                self.missed += 1
+            end = time.perf_counter()
+
+            self.window_ticks += 1
+            self.jitter_sum += start - next_tick
+            self.jitter_max = max(self.jitter_max, start - next_tick)
+            self.busy_sum += end - start
+            self.busy_max = max(self.busy_max, end - start)
+
+            next_tick += self.period
+            if end > next_tick:
+                # Overrun: skip the missed ticks instead of running them back to back.
+                self.overruns += 1
+                self.window_overruns += 1
+                next_tick = end
+            else:
+                time.sleep(next_tick - end)
+
+            if self.publish and time.time() - published >= self.stats_period:
+                self.publish({"loop": self.stats()})
+                self.reset_stats()
+                published = time.time()
+
+    def tick(self):
+        with self.bus.transaction(CONTROL, deadline=self.period):
+            with self.goals_lock:
+                goals, self.goals = self.goals, {kind: {} for kind in GOALS}
+
+            state = self.ctl.get_state()
+            for kind, values in goals.items():
+                if values:
+                    getattr(self.ctl, GOALS[kind])(list(values.values()), list(values))
+
+        self.state = state
+        self.ticks += 1
+
+    def stop(self):
+        self.running = False
+
+    def reset_stats(self):
+        self.window_ticks = self.window_overruns = 0
+        self.jitter_sum = self.jitter_max = self.busy_sum = self.busy_max = 0.0
+
+    def stats(self) -> dict:
+        "Tick timing since the last reset_stats() (in ms), plus total ticks, overruns and ticks missed."
+        n = max(self.window_ticks, 1)
+        return {"rate": 1/self.period, "ticks": self.ticks, "overruns": self.overruns, "missed": self.missed,
+                "window_ticks": self.window_ticks, "window_overruns": self.window_overruns,
+                "jitter_mean": self.jitter_sum/n*1e3, "jitter_max": self.jitter_max*1e3,
+                "busy_mean": self.busy_sum/n*1e3, "busy_max": self.busy_max*1e3}
+
+    # Goals, written on the next tick.
+    def set_goal(self, kind:str, goals, ids:list[int]=None) -> list[int]:
+        if ids is None:
+            ids = list(self.ctl.motors.keys())
+
+        if ndim(goals) == 0:
+            goals = [goals] * len(ids)
+
+        with self.goals_lock:
+            self.goals[kind].update(zip(ids, goals))
+        return list(ids)
+
+    def set_motor_position(self, goal, ids:list[int]=None):
+        return self.set_goal("position", goal, ids)
+
+    def set_motor_velocity(self, goal, ids:list[int]=None):
+        return self.set_goal("velocity", goal, ids)
+
+    def set_motor_pwm(self, goal, ids:list[int]=None):
+        return self.set_goal("pwm", goal, ids)
+
+    set_sync_motor_position = set_motor_position
+    set_sync_motor_velocity = set_motor_velocity
+    set_sync_motor_pwm      = set_motor_pwm
+
+    # State, as read on the last tick.
+    def get_state(self, ids:list[int]=None):
+        state = self.state
+        return state if ids is None else state[isin(state.id, ids)]
+
+    def latest(self, field:str, ids:list[int]=None) -> list:
+        state = self.state
+        if ids is None:
+            ids = list(self.ctl.motors.keys())
+
+        values = dict(zip(state.id.tolist(), state[field].tolist())) if field in state.dtype.names else {}
+        return [values.get(id) for id in ids]
+
+    def get_motor_position(self, ids:list[int]=None):
+        return self.latest("position", ids)
+
+    def get_load(self, ids:list[int]=None):
+        return [abs(load) if load is not None else None for load in self.latest("load", ids)]
+
+    def get_signed_load(self, ids:list[int]=None):
+        return self.latest("load", ids)
+
+    def get_torque(self, ids:list[int]=None):
+        return self.latest("torque", ids)
+
+    def get_mode(self, ids:list[int]=None):
+        return self.latest("mode", ids)
+
+    def get_voltage(self, ids:list[int]=None):
+        return self.latest("voltage", ids)
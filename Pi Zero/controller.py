@@ -1,11 +1,90 @@
 
-import sys, time
+import sys, os, time, json
+from struct import Struct, calcsize
+from contextlib import contextmanager
 
-from numpy import interp, round
+from numpy import ndim, dtype, recarray
 
 from motor_MX_28R import MX_28R as Motor
-from dynamixel_sdk import PortHandler, GroupSyncRead, COMM_SUCCESS                           # Uses Dynamixel SDK library
+from dynamixel_sdk import PortHandler, GroupSyncWrite, GroupBulkWrite, COMM_SUCCESS   # Uses Dynamixel SDK library
 from packet_handler_modified_p_2 import Protocol2PacketHandler as Packet_Handler
+from direction_control import make_direction, DIRECTION_GPIO
+
+
+# Goal register of each operating mode (0: Position, 1: Velocity, 2: PWM): (address, length, goal -> raw).
+GOAL_REGISTERS = {
+    0: (Motor.ADDR_MX_GOAL_POS, 4, Motor.position_to_raw),
+    1: (Motor.ADDR_MX_GOAL_VEL, 4, Motor.velocity_to_raw),
+    2: (Motor.ADDR_MX_GOAL_PWM, 2, Motor.pwm_to_raw),
+}
+
+
+class Bulk_Transaction():
+    """Register writes to several motors, at any address, sent by commit() as Bulk Write packets.
+
+    A Bulk Write packet carries one write per motor, each with its own address and length, so the
+    n-th write queued for a motor goes in the n-th packet: the writes of each motor keep their order
+    and the packets are as few as the motor with the most writes needs. Reconfiguring the whole hand
+    (torque off, mode, torque on, goals) takes 4 packets instead of a write and a status per motor
+    and register. Bulk Write has no status packet, nothing confirms the writes.
+
+    Goals and modes are one per motor in 'ids' or a single one for all of them (ids=None: every motor).
+    """
+
+    def __init__(self, ctl):
+        self.ctl    = ctl
+        self.phases = []    # GroupBulkWrite per packet, sent in order
+        self.next   = {}    # motor ID -> phase its next write goes in
+
+    def per_motor(self, values, ids:list[int]=None) -> dict:
+        if ids is None:
+            ids = list(self.ctl.motors.keys())
+        if ndim(values) == 0:
+            values = [values] * len(ids)
+        return dict(zip(ids, values))
+
+    def write(self, dxl_id:int, address:int, length:int, value:int):
+        "Queues a raw register write after the ones already queued for motor 'dxl_id'."
+        phase = self.next.get(dxl_id, 0)
+        if phase == len(self.phases):
+            self.phases.append(GroupBulkWrite(self.ctl.portHandler, self.ctl.packetHandler))
+
+        self.phases[phase].addParam(dxl_id, address, length, list(int(value & 0xFFFFFFFF).to_bytes(4, "little")[:length]))
+        self.next[dxl_id] = phase + 1
+
+    def set_torque(self, modes, ids:list[int]=None):
+        for id, mode in self.per_motor(modes, ids).items():
+            self.write(id, Motor.ADDR_MX_TORQUE_ENABLE, 1, int(mode))
+
+    def set_mode(self, modes, ids:list[int]=None):
+        "modes: 0: Position, 1: Velocity, 2: PWM"
+        for id, mode in self.per_motor(modes, ids).items():
+            self.write(id, Motor.ADDR_MX_MODE, 1, Motor.mode_to_raw(mode))
+
+    def set_goal(self, modes, goals, ids:list[int]=None):
+        "Writes each goal to the goal register of the motor's mode (degrees, rpm or % pwm, see GOAL_REGISTERS)."
+        modes = self.per_motor(modes, ids)
+        for id, goal in self.per_motor(goals, list(modes)).items():
+            address, length, to_raw = GOAL_REGISTERS[modes[id]]
+            self.write(id, address, length, to_raw(goal))
+
+    def commit(self) -> bool:
+        """Sends the queued writes, one Bulk Write packet per phase.
+
+        Returns:
+          True if every packet was sent; the phases after one that could not be are not sent.
+        """
+        for phase in self.phases:
+            for _ in range(5):
+                dxl_comm_result = phase.txPacket()
+                if dxl_comm_result == COMM_SUCCESS:
+                    break
+            else:
+                print(f"[!]: GroupBulkWrite failed: {self.ctl.packetHandler.getTxRxResult(dxl_comm_result)}")
+                return False
+
+        self.phases, self.next = [], {}
+        return True
 
 
 class Controller:
@@ -24,26 +103,57 @@ class Controller:
     # Broadcast address
     BROADCAST_ID            = 254               # ID for broadcasting to all the motors
 
+    # Telemetry snapshot: Present Load (126) ... Present Temperature (146) read as one window.
+    SNAPSHOT_ADDR           = Motor.ADDR_MX_PRESENT_LOAD
+    SNAPSHOT_LAYOUT         = Struct("<hiiiiHB")    # load (signed), velocity, position, velocity/position trajectory, voltage, temperature
+    SNAPSHOT_DTYPE          = dtype([("id", "u1"), ("position", "f8"), ("velocity", "f8"), ("load", "f8"),
+                                     ("voltage", "f8"), ("temperature", "u1"), ("timestamp", "f8")])
+
+    # Registers mirrored into the Indirect Data area at startup and read back by get_state() (see Motor.REGISTERS).
+    INDIRECT_REGISTERS      = ("mode", "torque", "load", "position", "voltage")
+
+    # Motor discovery: IDs pinged one by one (until n_motors answer) when the saved inventory no longer matches.
+    SCAN_IDS                = range(0, 16)
+    INVENTORY_FILE          = os.path.join(os.path.dirname(os.path.abspath(__file__)), "motor_inventory.json")
+
     # MISC
     motors:dict[int,Motor]  = {}
     portHandler             = None
+    direction               = DIRECTION_GPIO    # Half-duplex direction control backend (see begin).
     GIVE_INFO               = True
-    groupSyncRead           = None
+    fast_sync_read          = None              # Fast Sync Read on this bus: None (not probed yet), True or False.
+    groupSyncWrites         = {}                # (address, length) -> GroupSyncWrite
+    indirect_registers      = ()                # Registers currently mirrored into Indirect Data.
+    indirect_layout         = None
 
-    def __init__(self, n_motors=1, port=PORT_UART_PI, baud=BAUD_1M, info=True):
+    def __init__(self, n_motors=1, port=PORT_UART_PI, baud=BAUD_1M, info=True, direction=DIRECTION_GPIO):
         self.GIVE_INFO=info
         self.n_motors = n_motors
         
-        self.begin(port=port, baud=baud)
+        self.begin(port=port, baud=baud, direction=direction)
         self.find_motors(n_motors)
         self.config_sync_read()
+        self.config_indirect()
+
+    def begin(self, port=PORT_UART_PI, baud=BAUD_1M, direction=DIRECTION_GPIO):
+        """Opens the port.
 
-    def begin(self, port=PORT_UART_PI, baud=BAUD_1M):
+        Arguments:
+          direction: half-duplex direction control backend, "gpio" (RTS pin + sleep), "drain" (RTS pin
+                     + tcdrain), "outq" (RTS pin + TIOCOUTQ polling), "rs485" (kernel RS-485 mode) or
+                     "none" (USB adapters). See direction_control.
+        """
         if self.portHandler is not None and self.portHandler.is_open:
+            self.packetHandler.direction.close()
             self.portHandler.closePort()
 
+        self.direction = direction
+        self.port = port
+        self.baud = baud
         self.portHandler = PortHandler(port) # Initialize PortHandler instance and Set the port path
-        self.packetHandler = Packet_Handler(baud) # Initialize PacketHandler instance.
+        self.packetHandler = Packet_Handler(baud, make_direction(direction, baud)) # Initialize PacketHandler instance.
+        self.groupSyncWrites = {}
+        self.fast_sync_read = None
 
         if not self.portHandler.openPort():
             print("[E]: Failed to open the port")
@@ -53,15 +163,59 @@ class Controller:
             print("[E]: Failed to change the baudrate")
             sys.exit()
 
+        try:
+            self.packetHandler.direction.begin(self.portHandler)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"[E]: Failed to set up '{direction}' direction control: {e}")
+            sys.exit()
+
         print("[i]: Port opened and baud rate set to", baud)
 
     def set_extra_bytes(self, extra_bytes:int):
-        self.packetHandler.extra_bytes = extra_bytes
+        "Only used by the 'gpio' direction control to pad its wire time estimate."
+        self.packetHandler.direction.extra_bytes = extra_bytes
 
-    def find_motors(self, n_motors=None):
+    def get_turnaround(self, reset=False) -> dict:
+        "Turnaround statistics of the direction control backend (see No_Direction.stats)."
+        stats = self.packetHandler.direction.stats()
+        if reset:
+            self.packetHandler.direction.reset_stats()
+
+        if self.GIVE_INFO:
+            print(f"[#]: Direction '{stats['backend']}': {stats['packets']} packets, turnaround mean {stats['mean_us']:.0f} us "
+                  f"(max {stats['max_us']:.0f} us) for {stats['wire_us']:.0f} us on the wire")
+        return stats
+
+    def find_motors(self, n_motors=None, ids:list[int]=None, broadcast=False):
+        """Finds the motors on the bus.
+
+        The inventory saved by the last discovery is checked first with a single Sync Read. If it no
+        longer matches, 'ids' (SCAN_IDS by default) are pinged until n_motors answer, and the
+        broadcast ping is only used when that is not enough (or 'broadcast' is set).
+        """
         if n_motors:
             self.n_motors = n_motors
 
+        start = time.perf_counter()
+        previous = set(self.motors)
+
+        if not broadcast:
+            inventory = self.check_inventory()
+            if inventory:
+                self.motors = {dxl_id: Motor(self.portHandler, self.packetHandler, dxl_id) for dxl_id in inventory}
+                print(f"[i]: Dynamixel found ID {list(self.motors.keys())} (inventory, {(time.perf_counter() - start)*1e3:.0f} ms)")
+                return
+
+            dxl_data_list, _ = self.packetHandler.scanPing(self.portHandler, self.SCAN_IDS if ids is None else ids, self.n_motors)
+            self.motors = {dxl_id: Motor(self.portHandler, self.packetHandler, dxl_id) for dxl_id in sorted(dxl_data_list.keys())}
+
+            if len(self.motors) >= self.n_motors:
+                print(f"[i]: Dynamixel found ID {list(self.motors.keys())} (scan, {(time.perf_counter() - start)*1e3:.0f} ms)")
+                self.save_inventory(dxl_data_list)
+                self.motors_changed(previous)
+                return
+
+        self.motors = {}
         while len(self.motors) < self.n_motors:
             dxl_data_list, _ = self.packetHandler.broadcastPing(self.portHandler)
 
@@ -73,6 +227,50 @@ class Controller:
                 print("[!]: Cannot not find any motor")
                 sys.exit()
 
+        self.save_inventory(dxl_data_list)
+        self.motors_changed(previous)
+
+    def motors_changed(self, previous:set[int]):
+        "Forgets the Fast Sync Read support worked out for the 'previous' motors if a scan found others."
+        if set(self.motors) != previous:
+            self.fast_sync_read = None
+
+    def save_inventory(self, dxl_data_list:dict[int,list[int]]):
+        "Saves IDs, model numbers and firmware of the motors found, with the port and baud rate they were found at."
+        inventory = {"port": self.port, "baud": self.baud,
+                     "motors": {str(dxl_id): {"model": model, "firmware": firmware} for dxl_id, (model, firmware) in dxl_data_list.items()}}
+        try:
+            with open(self.INVENTORY_FILE, "w") as f:
+                json.dump(inventory, f, indent=2)
+        except OSError as e:
+            print(f"[!]: Could not save the motor inventory: {e}")
+
+    def check_inventory(self) -> list[int]:
+        """Checks the saved inventory against the bus with one Sync Read of Model Number (0) ... Firmware Version (6).
+
+        Returns:
+          ids: inventory IDs if every motor still answers with the same model and firmware, else [].
+        """
+        try:
+            with open(self.INVENTORY_FILE) as f:
+                inventory = json.load(f)
+            motors = {int(dxl_id): (motor["model"], motor["firmware"]) for dxl_id, motor in inventory["motors"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+
+        if inventory.get("port") != self.port or inventory.get("baud") != self.baud or len(motors) < self.n_motors:
+            return []
+
+        ids = sorted(motors)
+        data = self.sync_read(Motor.ADDR_MX_MODEL_NUMBER, Motor.ADDR_MX_FIRMWARE_VERSION + 1, ids, retries=1)
+        found = {dxl_id: (window[0] | window[1] << 8, window[Motor.ADDR_MX_FIRMWARE_VERSION]) for dxl_id, window in data.items()}
+
+        if found != motors:
+            self.fast_sync_read = None  # A missing motor says nothing about Fast Sync Read support.
+            return []
+
+        return ids
+
     def set_led(self, mode, ids:list[int]=None):
         if ids is None: 
             ids = self.motors
@@ -127,7 +325,7 @@ class Controller:
 
         modes = [self.motors[id].get_mode() for id in ids]
         if modes and self.GIVE_INFO:
-            print(f"[#]: Motor_{ids}: Current mode is = {[info[mode] if mode is not None else None for mode in modes]}")
+            print(f"[#]: Motor_{ids}: Current mode is = {[None if mode is None else 'UNKNOWN' if mode == -1 else info[mode] for mode in modes]}")
 
         return modes
     
@@ -151,6 +349,17 @@ class Controller:
 
         return loads
 
+    def get_signed_load(self, ids:list[int]=None):
+        "Like get_load(), negative when opening."
+        if ids is None: 
+            ids = list(self.motors.keys())
+
+        loads = [self.motors[id].get_signed_load() for id in ids]
+        if loads and self.GIVE_INFO:
+            print(f"[#]: Motor_{ids}: Current signed load is = {loads} %")
+
+        return loads
+
     def get_motor_position(self, ids:list[int]=None):
         if ids is None: 
             ids = list(self.motors.keys())
@@ -174,42 +383,174 @@ class Controller:
 
         return positions
 
-    def config_sync_read(self):
-        # Initialize GroupSyncRead instace for Present Position
-        self.groupSyncRead = GroupSyncRead(self.portHandler, self.packetHandler, Motor.ADDR_MX_PRESENT_POSITION, 4)
-
-        # Add parameter storage for Dynamixel#1 present position value
-        for motor_id in self.motors:
-            if not self.groupSyncRead.addParam(motor_id) :
-                print(f"[ID:{motor_id}] groupSyncRead addparam failed")
-                return f"[ID:{motor_id}] groupSyncRead addparam failed"
-            
-        return f"[i]: GroupSyncRead added motor {list(self.motors.keys())}"
-            
-    def get_sync_motor_position(self):
-        for _ in range(5):
-            dxl_comm_result = self.groupSyncRead.txRxPacket()
+    def sync_read(self, address:int, length:int, ids:list[int]=None, retries=5) -> dict[int,bytes]:
+        """Reads the same control table window from several motors with one Sync Read.
 
-            if dxl_comm_result == COMM_SUCCESS:
-                dxl_getdata_results = [self.groupSyncRead.isAvailable(motor_id, Motor.ADDR_MX_PRESENT_POSITION, 4) for motor_id in self.motors]
-                if not False in dxl_getdata_results:
+        Fast Sync Read (all motors answering in one status packet) is used while the bus supports it.
+        The first read probes it; if it is not answered the bus falls back to regular Sync Read. A
+        Fast Sync Read that is not answered is retried the regular way within the same attempt: only
+        regular reads count against 'retries'.
+
+        Returns:
+          data: raw window per motor ID (empty if the read failed).
+        """
+        if ids is None:
+            ids = list(self.motors.keys())
+
+        fast = self.fast_sync_read is not False
+
+        attempts = 0
+        while attempts < retries:
+            dxl_comm_result = self.packetHandler.syncReadTx(self.portHandler, address, length, ids, len(ids), fast)
+            if dxl_comm_result != COMM_SUCCESS:
+                attempts += 1
+                continue
+
+            if fast:
+                data, dxl_comm_result, _ = self.packetHandler.fastSyncReadRx(self.portHandler, ids, length)
+                if dxl_comm_result == COMM_SUCCESS:
+                    self.fast_sync_read = True
+                    return data
+
+                if self.fast_sync_read is None:
+                    print("[i]: Fast Sync Read not answered, using regular Sync Read")
+                    self.fast_sync_read = False
+
+                fast = False    # Retry this read the regular way, still the same attempt.
+                continue
+
+            data = {}
+            for motor_id in ids:
+                data[motor_id], dxl_comm_result, _ = self.packetHandler.readRx(self.portHandler, motor_id, length)
+                if dxl_comm_result != COMM_SUCCESS:
                     break
-                else:
-                    error_msg = f"[!]: GroupSyncRead getdata failed: {dxl_getdata_results}"
             else:
-                error_msg = f"[!]: {self.packetHandler.getTxRxResult(dxl_comm_result)}"
+                return data
+
+            attempts += 1
+
+        print(f"[!]: (ADDR_{address}) Sync Read failed: {self.packetHandler.getTxRxResult(dxl_comm_result)}")
+        return {}
+
+    def snapshot(self, ids:list[int]=None) -> recarray:
+        """Reads load, velocity, position, voltage and temperature of every motor in one Sync Read.
+
+        Returns:
+          state: record array with one (id, position, velocity, load, voltage, temperature, timestamp)
+                 record per motor that answered, all sampled in the same bus transaction.
+        """
+        data = self.sync_read(self.SNAPSHOT_ADDR, self.SNAPSHOT_LAYOUT.size, ids)
+        timestamp = time.time()
+
+        state = recarray(len(data), dtype=self.SNAPSHOT_DTYPE)
+        for record, (motor_id, window) in zip(state, data.items()):
+            load, velocity, position, _, _, voltage, temperature = self.SNAPSHOT_LAYOUT.unpack(window)
+            record["id"]            = motor_id
+            record["position"]      = Motor.raw_to_position(position)
+            record["velocity"]      = Motor.raw_to_velocity(velocity)
+            record["load"]          = Motor.raw_to_load(load)
+            record["voltage"]       = Motor.raw_to_voltage(voltage)
+            record["temperature"]   = temperature
+            record["timestamp"]     = timestamp
+
+        if self.GIVE_INFO:
+            print(f"[#]: Motor_{list(data)}: Snapshot = {state}")
+
+        return state
+
+    def config_indirect(self, registers:tuple[str]=None):
+        """Maps scattered registers into one contiguous block of the Indirect Data area (224).
+
+        Each data byte gets an Indirect Address (168) pointing at the register byte it mirrors, so
+        get_state() reads them all with a single Sync Read. Torque is disabled while programming.
+
+        Arguments:
+          registers: names from Motor.REGISTERS, in block order (defaults to INDIRECT_REGISTERS).
+        """
+        registers = self.INDIRECT_REGISTERS if registers is None else tuple(registers)
+        layout = Struct("<" + "".join(Motor.REGISTERS[name][1] for name in registers))
+
+        if layout.size > Motor.MAX_INDIRECT:
+            print(f"[!]: Indirect registers {registers} need {layout.size} bytes (max {Motor.MAX_INDIRECT})")
+            return False
+
+        addresses = bytearray()
+        for name in registers:
+            address, fmt, _ = Motor.REGISTERS[name]
+            for byte in range(calcsize(fmt)):
+                addresses += (address + byte).to_bytes(2, "little")
+
+        enabled = [id for id, torque in self.sync_read(Motor.ADDR_MX_TORQUE_ENABLE, 1).items() if torque[0]]
+        if enabled:
+            self.set_sync_torque(0, enabled)
+
+        self.sync_write(Motor.ADDR_MX_INDIRECT_ADDRESS, len(addresses), {id: addresses for id in self.motors})
+        programmed = self.sync_read(Motor.ADDR_MX_INDIRECT_ADDRESS, len(addresses))
+
+        if enabled:
+            self.set_sync_torque(1, enabled)
+
+        if len(programmed) != len(self.motors) or any(data != addresses for data in programmed.values()):
+            print("[!]: Indirect address mapping failed, get_state() will read registers one by one")
+            self.indirect_registers, self.indirect_layout = registers, None
+            return False
+
+        self.indirect_registers, self.indirect_layout = registers, layout
+        print(f"[i]: Indirect data mapped to {list(registers)}")
+        return True
+
+    def get_state(self, ids:list[int]=None) -> recarray:
+        """Reads the registers mapped by config_indirect() from every motor with one Sync Read.
+
+        Returns:
+          state: record array with id, one field per mapped register (in its unit) and a timestamp.
+        """
+        if self.indirect_layout is not None:
+            data = self.sync_read(Motor.ADDR_MX_INDIRECT_DATA, self.indirect_layout.size, ids)
+            timestamp = time.time()
+            values = {id: self.indirect_layout.unpack(window) for id, window in data.items()}
         else:
+            # Fallback: one Sync Read per register.
+            reads = [self.sync_read(Motor.REGISTERS[name][0], calcsize(Motor.REGISTERS[name][1]), ids) for name in self.indirect_registers]
+            timestamp = time.time()
+            data = reads[0] if reads else {}
+            values = {id: [Struct("<" + Motor.REGISTERS[name][1]).unpack(read[id])[0] for name, read in zip(self.indirect_registers, reads)]
+                      for id in data if all(id in read for read in reads)}
+
+        fields = [("id", "u1")] + [(name, Motor.REGISTERS[name][2]) for name in self.indirect_registers] + [("timestamp", "f8")]
+        state = recarray(len(values), dtype=dtype(fields))
+
+        for record, (motor_id, raws) in zip(state, values.items()):
+            record["id"] = motor_id
+            for name, raw in zip(self.indirect_registers, raws):
+                record[name] = Motor.from_raw(name, raw)
+            record["timestamp"] = timestamp
+
+        if self.GIVE_INFO:
+            print(f"[#]: Motor_{list(values)}: State = {state}")
+
+        return state
+
+    def config_sync_read(self):
+        # Present Position read of every motor. It probes Fast Sync Read support, unless the inventory
+        # check already did for these motors (see find_motors).
+        if len(self.sync_read(Motor.ADDR_MX_PRESENT_POSITION, 4)) != len(self.motors):
+            print(f"[!]: Sync Read failed for motors {list(self.motors.keys())}")
+            return f"[!]: Sync Read failed for motors {list(self.motors.keys())}"
+
+        kind = "Fast Sync Read" if self.fast_sync_read else "Sync Read"
+        return f"[i]: {kind} added motor {list(self.motors.keys())}"
+
+    def get_sync_motor_position(self):
+        data = self.sync_read(Motor.ADDR_MX_PRESENT_POSITION, 4)
+        if len(data) != len(self.motors):
+            error_msg = f"[!]: Sync Read getdata failed: {[motor_id in data for motor_id in self.motors]}"
             print(error_msg)
             return error_msg
-        
 
-        position = [self.groupSyncRead.getData(motor_id, Motor.ADDR_MX_PRESENT_POSITION, 4) for motor_id in self.motors]
+        position = [int.from_bytes(data[motor_id], "little", signed=True) for motor_id in self.motors]
+        pos = list(Motor.raw_to_position(position))
 
-        MAX_GOAL                    = 1048575           # Maximum goal input. (4095 == 360º).
-        MAX_REVOLUTIONS             = MAX_GOAL/4095     # Maximum number of revolutions of the motor (256).
-
-        pos = list(round(interp(position, [-MAX_GOAL, MAX_GOAL], [-MAX_REVOLUTIONS*360,MAX_REVOLUTIONS*360]), 2))
-        
         if self.GIVE_INFO:
             print(f"[#]: Motor_{list(self.motors.keys())}: Current position is = {pos}º")
 
@@ -245,13 +586,172 @@ class Controller:
             print(f"[#]: Motor_{succeded}: Goal PWM has been set = [{goal}]")
         return succeded
 
+    def sync_write(self, address:int, length:int, values:dict[int,int]) -> bool:
+        """Writes one register on several motors with a single Sync Write packet.
+
+        Arguments:
+          address: control table address.
+          length:  register size in bytes (1, 2 or 4), or data length when writing raw bytes.
+          values:  raw register value (or bytes of 'length') per motor ID.
+
+        Returns:
+          True if the packet was sent (Sync Write has no status packet to confirm it).
+        """
+        key = (address, length)
+        if key not in self.groupSyncWrites:
+            self.groupSyncWrites[key] = GroupSyncWrite(self.portHandler, self.packetHandler, address, length)
+
+        groupSyncWrite = self.groupSyncWrites[key]
+        groupSyncWrite.clearParam()
+
+        for motor_id, value in values.items():
+            if isinstance(value, (bytes, bytearray)):
+                groupSyncWrite.addParam(motor_id, list(value))
+            else:
+                groupSyncWrite.addParam(motor_id, list(int(value & 0xFFFFFFFF).to_bytes(4, "little")[:length]))
+
+        for _ in range(5):
+            dxl_comm_result = groupSyncWrite.txPacket()
+            if dxl_comm_result == COMM_SUCCESS:
+                return True
+
+        print(f"[!]: (ADDR_{address}) GroupSyncWrite failed: {self.packetHandler.getTxRxResult(dxl_comm_result)}")
+        return False
+
+    def sync_set(self, address:int, length:int, to_raw, fallback, goals, ids:list[int]=None) -> list[int]:
+        """Sends per-motor goals as one Sync Write, falling back to one write (and status) per motor.
+
+        Arguments:
+          to_raw:   converts a goal to its register value (e.g. Motor.position_to_raw).
+          fallback: per-motor setter used if the Sync Write can't be sent (e.g. Motor.set_motor_position).
+          goals:    one goal per motor in 'ids', or a single goal for all of them.
+        """
+        if ids is None:
+            ids = list(self.motors.keys())
+
+        if ndim(goals) == 0:
+            goals = [goals] * len(ids)
+
+        goals = dict(zip(ids, goals))
+
+        if self.sync_write(address, length, {id: to_raw(goal) for id, goal in goals.items()}):
+            return list(goals)
+
+        return [id for id, goal in goals.items() if fallback(self.motors[id], goal)]
+
+    def set_sync_torque(self, modes, ids:list[int]=None):
+        "modes: 0/1 per motor in 'ids' (or one for all)"
+
+        succeded = self.sync_set(Motor.ADDR_MX_TORQUE_ENABLE, 1, int, Motor.set_torque, modes, ids)
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Torque has been set = {modes}")
+        return succeded
+
+    def set_sync_mode(self, modes, ids:list[int]=None):
+        "modes: 0: Position, 1: Velocity, 2: PWM, per motor in 'ids' (or one for all)"
+
+        succeded = self.sync_set(Motor.ADDR_MX_MODE, 1, Motor.mode_to_raw, Motor.set_mode, modes, ids)
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Mode has been set = {modes}")
+        return succeded
+
+    def set_sync_motor_position(self, goals, ids:list[int]=None):
+        "goals: degrees per motor in 'ids' (or one for all)"
+
+        succeded = self.sync_set(Motor.ADDR_MX_GOAL_POS, 4, Motor.position_to_raw, Motor.set_motor_position, goals, ids)
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Goal position has been set = {goals}º")
+        return succeded
+
+    def set_sync_motor_velocity(self, goals, ids:list[int]=None):
+        "goals: -229 ~ 229 per motor in 'ids' (or one for all)"
+
+        succeded = self.sync_set(Motor.ADDR_MX_GOAL_VEL, 4, Motor.velocity_to_raw, Motor.set_motor_velocity, goals, ids)
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Goal velocity has been set = {goals}")
+        return succeded
+
+    def set_sync_motor_pwm(self, goals, ids:list[int]=None):
+        "goals: 0-100% pwm per motor in 'ids' (or one for all)"
+
+        succeded = self.sync_set(Motor.ADDR_MX_GOAL_PWM, 2, Motor.pwm_to_raw, Motor.set_motor_pwm, goals, ids)
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Goal PWM has been set = {goals}")
+        return succeded
+
+    @contextmanager
+    def transaction(self):
+        """Collects the writes queued on the Bulk_Transaction it gives and sends them as Bulk Write
+        packets when the with block ends (not if it raises). Raises OSError if they could not be sent.
+
+            with ctl.transaction() as transaction:
+                transaction.set_torque(0)
+                transaction.set_mode(2)
+                transaction.set_torque(1)
+        """
+        transaction = Bulk_Transaction(self)
+        yield transaction
+        if not transaction.commit():
+            raise OSError("Bulk Write transaction not sent")
+
+    def switch_mode(self, modes, ids:list[int]=None, goals=None):
+        """Torque off, operating mode, torque on (and goals in the new mode) in one transaction: 3 or
+        4 Bulk Write packets whatever the number of motors. The result is checked with one get_state()
+        read, motors that did not switch get the former write and status sequence.
+
+        Arguments:
+          modes: 0: Position, 1: Velocity, 2: PWM, per motor in 'ids' (or one for all).
+          goals: goal per motor in the unit of its new mode (or one for all), None to keep them.
+        """
+        if ids is None:
+            ids = list(self.motors.keys())
+
+        if ndim(modes) == 0:
+            modes = [modes] * len(ids)
+
+        modes = dict(zip(ids, modes))
+        if goals is not None and ndim(goals) == 0:
+            goals = [goals] * len(ids)
+
+        try:
+            with self.transaction() as transaction:
+                transaction.set_torque(0, list(modes))
+                transaction.set_mode(list(modes.values()), list(modes))
+                transaction.set_torque(1, list(modes))
+                if goals is not None:
+                    transaction.set_goal(list(modes.values()), goals, list(modes))
+        except OSError:
+            pass    # The read below finds the motors it did not switch, they get the fallback.
+
+        state = self.get_state(list(modes))
+        if "mode" in state.dtype.names and "torque" in state.dtype.names:
+            switched = {int(id) for id, mode, torque in zip(state.id, state.mode, state.torque) if mode == modes[id] and torque}
+        else:
+            switched = {id for id in modes if id in state.id}
+
+        setters = (Motor.set_motor_position, Motor.set_motor_velocity, Motor.set_motor_pwm)
+        for index, id in enumerate(modes):
+            motor = self.motors[id]
+            if id in switched or not (motor.set_torque(0) and motor.set_mode(modes[id]) and motor.set_torque(1)):
+                continue
+
+            print(f"[!]: Motor_{id}: Bulk Write mode switch not applied, switched one write at a time")
+            if goals is not None:
+                setters[modes[id]](motor, goals[index])
+            switched.add(id)
+
+        succeded = [id for id in modes if id in switched]
+        if succeded and self.GIVE_INFO:
+            print(f"[#]: Motor_{succeded}: Mode has been switched = {[modes[id] for id in succeded]}")
+        return succeded
+
     def set_motor_baudrate(self, baud:int, ids:list[int]=None):
         if ids is None: 
             ids = self.motors
 
         succeded = [id for id in ids if self.motors[id].set_motor_baudrate(baud)]
 
-        self.begin(baud=baud)
+        self.begin(baud=baud, direction=self.direction)
         self.find_motors(self.n_motors)
 
         if succeded and self.GIVE_INFO:
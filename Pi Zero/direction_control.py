@@ -0,0 +1,192 @@
+"""Half-duplex direction control for the Dynamixel TTL bus.
+
+The MX-28R bus is a single wire: the transceiver has to be switched to transmit before an
+instruction packet is written and back to receive once its last stop bit is out, or the
+start of the status packet is lost. Each backend does that switch differently:
+
+  gpio:   RTS_PIN raised/lowered through RPi.GPIO, waiting the estimated wire time with sleep().
+  drain:  same pin, but lowered as soon as the kernel reports the UART drained (tcdrain).
+  outq:   same pin, busy-polling the output queue (TIOCOUTQ) instead of sleeping in tcdrain.
+  rs485:  kernel RS-485 mode (TIOCSRS485), the UART toggles its hardware RTS line itself.
+          On the Pi the PL011 RTS0 is GPIO17 (ALT3), so the transceiver wiring stays the same.
+  none:   nothing to switch, the adapter does it (U2D2, USB2Dynamixel).
+
+Every backend measures its turnaround: the time from the end of the write() call until the
+bus is back in receive mode.
+"""
+
+import struct
+from time import perf_counter, sleep
+
+try:
+    import fcntl, termios
+except ImportError:     # Windows
+    fcntl = termios = None
+
+
+RTS_PIN     = 17
+EXTRA_BYTES = 3
+
+DIRECTION_GPIO  = "gpio"
+DIRECTION_DRAIN = "drain"
+DIRECTION_OUTQ  = "outq"
+DIRECTION_RS485 = "rs485"
+DIRECTION_NONE  = "none"
+
+
+class No_Direction(object):
+    "No direction switching, the adapter does it."
+
+    NAME = DIRECTION_NONE
+
+    def __init__(self, baud):
+        self.baud = baud
+        self.ser = None         # Serial object the backend was set up for.
+        self.reset_stats()
+
+    def begin(self, port):
+        "Sets the backend up for the (open) PortHandler 'port'."
+        self.ser = port.ser
+
+    def close(self):
+        self.ser = None
+
+    def tx(self):
+        "Switches the bus to transmit, called right before writing a packet."
+        pass
+
+    def rx(self):
+        "Switches the bus to receive."
+        pass
+
+    def wait_sent(self, length):
+        "Returns once the last of 'length' written bytes has left the UART."
+        pass
+
+    def sent(self, length):
+        "Called right after writing 'length' bytes: returns the bus to receive once they are out."
+        start = perf_counter()
+        self.wait_sent(length)
+        self.rx()
+        elapsed = perf_counter() - start
+
+        self.count  += 1
+        self.total  += elapsed
+        self.wire   += length * 10 / self.baud      # 10 bits per byte: start + 8 data + stop
+        self.max     = max(self.max, elapsed)
+
+    def reset_stats(self):
+        self.count, self.total, self.wire, self.max = 0, 0.0, 0.0, 0.0
+
+    def stats(self) -> dict:
+        """Turnaround statistics since the last reset.
+
+        Returns:
+          stats: backend name, number of packets, mean and max turnaround and mean wire time of
+                 the packets (us). Turnaround well above the wire time is time the bus sits idle.
+        """
+        count = max(self.count, 1)
+        return {"backend": self.NAME, "packets": self.count, "mean_us": self.total / count * 1e6,
+                "max_us": self.max * 1e6, "wire_us": self.wire / count * 1e6}
+
+
+class GPIO_Direction(No_Direction):
+    "RTS_PIN driven through RPi.GPIO, lowered after sleeping the estimated wire time."
+
+    NAME = DIRECTION_GPIO
+
+    def __init__(self, baud, pin=RTS_PIN, extra_bytes=EXTRA_BYTES):
+        super().__init__(baud)
+        self.pin = pin
+        self.extra_bytes = extra_bytes
+        self.GPIO = None
+
+    def begin(self, port):
+        if self.GPIO is None:
+            import RPi.GPIO as GPIO # type: ignore
+
+            GPIO.setwarnings(False)
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(self.pin, GPIO.OUT)
+            self.GPIO = GPIO
+
+        self.rx()
+        super().begin(port)
+
+    def tx(self):
+        self.GPIO.output(self.pin, self.GPIO.HIGH)
+
+    def rx(self):
+        self.GPIO.output(self.pin, self.GPIO.LOW)
+
+    def wait_sent(self, length):
+        sleep((length + self.extra_bytes) * 8 / self.baud)
+
+
+class Drain_Direction(GPIO_Direction):
+    "RTS_PIN lowered as soon as the UART has sent everything (tcdrain, or TIOCOUTQ polling)."
+
+    NAME = DIRECTION_DRAIN
+
+    def __init__(self, baud, pin=RTS_PIN, poll=False):
+        super().__init__(baud, pin, extra_bytes=0)
+        self.poll = poll
+        if poll:
+            self.NAME = DIRECTION_OUTQ
+        self.outq = bytearray(4)
+
+    def begin(self, port):
+        if termios is None:
+            raise OSError("termios is not available on this platform")
+
+        super().begin(port)
+        self.fd = port.ser.fileno()
+
+    def wait_sent(self, length):
+        if not self.poll:
+            termios.tcdrain(self.fd)
+            return
+
+        # TIOCOUTQ counts bytes not yet handed to the UART, the last one is still shifting out.
+        while True:
+            fcntl.ioctl(self.fd, termios.TIOCOUTQ, self.outq)
+            if not struct.unpack("i", self.outq)[0]:
+                break
+
+        end = perf_counter() + 10 / self.baud
+        while perf_counter() < end:
+            pass
+
+
+class RS485_Direction(No_Direction):
+    "Kernel RS-485 mode: the UART raises RTS for the length of each transmission."
+
+    NAME = DIRECTION_RS485
+
+    def begin(self, port):
+        from serial.rs485 import RS485Settings
+
+        # Raises ValueError if the UART driver does not support TIOCSRS485.
+        port.ser.rs485_mode = RS485Settings(rts_level_for_tx=True, rts_level_for_rx=False)
+        super().begin(port)
+
+    def close(self):
+        if self.ser is not None and self.ser.is_open:
+            self.ser.rs485_mode = None
+        super().close()
+
+
+DIRECTION_BACKENDS = {
+    DIRECTION_GPIO:     GPIO_Direction,
+    DIRECTION_DRAIN:    Drain_Direction,
+    DIRECTION_OUTQ:     lambda baud: Drain_Direction(baud, poll=True),
+    DIRECTION_RS485:    RS485_Direction,
+    DIRECTION_NONE:     No_Direction,
+}
+
+
+def make_direction(name:str, baud:int) -> No_Direction:
+    "Returns a new direction control backend by name (see DIRECTION_BACKENDS)."
+    if name not in DIRECTION_BACKENDS:
+        raise ValueError(f"Unknown direction control '{name}', use one of {list(DIRECTION_BACKENDS)}")
+    return DIRECTION_BACKENDS[name](baud)
@@ -0,0 +1,171 @@
+import re, ast, json
+from functools import lru_cache
+from struct import Struct
+
+from protocol import COMMAND, COMMANDS, is_binary
+from bus_arbiter import priority_of
+
+
+# "method(arguments)" whose arguments are numbers and lists of numbers, possibly as keywords: what the GUI
+# sends. Such arguments are read as JSON instead of being parsed as Python.
+CALL     = re.compile(r"\s*([A-Za-z_]\w*)\((.*)\)\s*")
+KEYWORD  = re.compile(r"([A-Za-z_]\w*)\s*=")
+NUMBERS  = re.compile(r"[-\d\s,.eE\[\]]*")
+
+
+def read_numeric(arguments:str) -> tuple:
+    """Reads the numeric 'arguments' of a call as JSON into (args, kwargs).
+
+    Returns None for anything else (strings, names, Python-only syntax such as "1." or "[1,]") or
+    an invalid call, which parse_call() then reads or rejects.
+    """
+    parts = KEYWORD.split(arguments) if "=" in arguments else [arguments]
+    if not all(NUMBERS.fullmatch(part) for part in parts[::2]):
+        return None
+
+    texts = [part.strip() for part in parts[::2]]
+    for i in range(len(texts) - 1):     # Every argument followed by a keyword ends with a comma.
+        if not texts[i]:
+            continue
+        if not texts[i].endswith(",") or not texts[i][:-1].strip():
+            return None
+        texts[i] = texts[i][:-1]
+
+    names = parts[1::2]
+    if not all(texts[1:]) or len(set(names)) < len(names):
+        return None
+
+    try:
+        return tuple(json.loads(f"[{texts[0]}]")), {name: json.loads(text) for name, text in zip(names, texts[1:])}
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def parse_call(command:str) -> tuple:
+    """Parses a text command, "method(literal args)" or "attribute", into (name, argument nodes, keyword nodes).
+
+    The GUI sends the same few commands over and over, so the parses are cached. The arguments are
+    left as ast nodes: the cached entries never hold the values handed to the Controller methods.
+    """
+    node = ast.parse(command.strip(), mode="eval").body
+
+    if isinstance(node, ast.Name):
+        return node.id, None, None
+
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        raise ValueError("expected method(arguments)")
+
+    return node.func.id, tuple(node.args), tuple((keyword.arg, keyword.value) for keyword in node.keywords)
+
+
+def parse_text(command:str) -> tuple:
+    """Parses a text command, "method(literal args)" or "attribute", into (name, args, kwargs).
+
+    Arguments must be literals (numbers, strings, lists...), nothing is evaluated. Numeric calls are
+    read as JSON (see read_numeric), faster than parsing them, and new slider goals would miss a cache
+    anyway. The other commands are rebuilt from the cached parse (see parse_call). Either way every
+    call gets new values, so a method changing a list it was given does not change the next command.
+    """
+    match = CALL.fullmatch(command)
+    if match:
+        arguments = read_numeric(match[2])
+        if arguments is not None:
+            return match[1], *arguments
+
+    name, args, keywords = parse_call(command)
+    if args is None:
+        return name, None, None
+
+    return name, tuple(ast.literal_eval(arg) for arg in args), {key: ast.literal_eval(value) for key, value in keywords}
+
+
+class Dispatcher():
+    """Runs client commands on a Controller.
+
+    Binary commands (see protocol.COMMANDS) go through a table of the bound Controller methods built
+    once, text commands ("set_motor_position(30, [1])") through parse_text(). run() returns the result
+    of the method, or an error message.
+
+    With a Control_Loop, the goal setters and state getters it serves (Control_Loop.COMMANDS) run on
+    it instead and never touch the bus. Controller methods run as Bus_Arbiter transactions of their
+    priority class (see bus_arbiter.priority_of), if a 'bus' is given.
+    """
+
+    def __init__(self, ctl, loop=None, bus=None):
+        self.ctl = ctl
+        self.loop = loop
+        self.bus = bus
+
+        # opcode -> (bound method, arguments, value format)
+        self.table = {opcode: (self.resolve(name), arguments, fmt) for opcode, (name, arguments, fmt) in COMMANDS.items()}
+        self.values = {}    # (value format, count) -> Struct of the values
+        self.masks = {}     # motor mask -> motor IDs
+
+    def resolve(self, name:str):
+        "Returns the loop's method 'name' if it serves it, else the Controller attribute (run on the bus if callable)."
+        if self.loop is not None and name in self.loop.COMMANDS:
+            return getattr(self.loop, name)
+
+        attribute = getattr(self.ctl, name)
+        if self.bus is None or not callable(attribute):
+            return attribute
+
+        priority = priority_of(name)
+        def transaction(*args, **kwargs):
+            with self.bus.transaction(priority):
+                return attribute(*args, **kwargs)
+        return transaction
+
+    def name(self, command) -> str:
+        "Returns the name of the method (or attribute) 'command' calls, None if it is not a valid command."
+        try:
+            if is_binary(command):
+                return COMMANDS[command[0]][0]
+            return parse_call(command)[0]
+        except Exception:
+            return None
+
+    def run(self, command) -> str:
+        try:
+            if is_binary(command):
+                output = self.run_binary(command)
+            elif not command or command.casefold() == "none":
+                output = "[#]: None"
+            else:
+                output = self.run_text(command)
+        except Exception as e:
+            output = f"[!]: Wrong Command! '{command}' -> {e}"
+
+        return output
+
+    def run_binary(self, command:bytes):
+        opcode, mask, count = COMMAND.unpack_from(command)
+        method, arguments, fmt = self.table[opcode]
+
+        if mask not in self.masks:
+            self.masks[mask] = tuple(id for id in range(16) if mask >> id & 1)
+        ids = list(self.masks[mask]) if mask else None
+
+        if not arguments:
+            return method(ids)
+
+        key = (fmt, count)
+        if key not in self.values:
+            self.values[key] = Struct(f"<{count}{fmt}")
+        values = self.values[key].unpack_from(command, COMMAND.size)
+
+        if arguments == "one" or len(values) == 1:
+            return method(values[0], ids)
+        return method(list(values), ids)
+
+    def run_text(self, command:str):
+        name, args, kwargs = parse_text(command)
+        if name.startswith("_"):
+            raise ValueError(f"'{name}' is private")
+
+        attribute = self.resolve(name)
+        if args is None:
+            return attribute
+
+        return attribute(*args, **kwargs)
@@ -0,0 +1,50 @@
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+
+# picamera2 format -> channel order of the array it returns (picamera2 names follow DRM, little endian).
+COLORSPACES = {"BGR888": "RGB", "RGB888": "BGR", "XBGR8888": "RGBX", "XRGB8888": "BGRX"}
+
+
+class JPEG_Encoder():
+    """Encodes camera frames to JPEG straight from the frame memory with simplejpeg (libjpeg-turbo).
+
+    Frames are passed as the array picamera2 maps over its capture buffer: no copy of the frame
+    is made, rows may be padded and YUV420 planes are encoded without converting to RGB.
+    """
+
+    def __init__(self, format="BGR888", size=(640,480), quality=50):
+        if format != "YUV420" and format not in COLORSPACES:
+            raise ValueError(f"Unsupported format '{format}', use YUV420 or one of {list(COLORSPACES)}")
+
+        self.format     = format
+        self.size       = size
+        self.quality    = quality
+
+    @staticmethod
+    def available() -> bool:
+        return simplejpeg is not None
+
+    def encode(self, array) -> bytes:
+        if self.format == "YUV420":
+            return simplejpeg.encode_jpeg_yuv_planes(*self.yuv_planes(array), quality=self.quality)
+
+        width, height = self.size
+        return simplejpeg.encode_jpeg(array[:height, :width], quality=self.quality,
+                                      colorspace=COLORSPACES[self.format], colorsubsampling="420")
+
+    def yuv_planes(self, array):
+        """Splits a YUV420 (I420) frame of shape (height*3/2, stride) into views of its Y, U and V planes.
+
+        U and V rows are stride/2 wide, so each array row holds two of them.
+        """
+        width, height = self.size
+        stride = array.shape[1]
+
+        Y = array[:height, :width]
+        U = array[height: height + height//4].reshape(height//2, stride//2)[:, :width//2]
+        V = array[height + height//4: height + height//2].reshape(height//2, stride//2)[:, :width//2]
+
+        return Y, U, V
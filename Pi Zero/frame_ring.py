@@ -0,0 +1,83 @@
+from multiprocessing import shared_memory
+from struct import Struct
+
+
+class Frame_Ring():
+    """Ring of JPEG frames in shared memory, written by one process and read by others.
+
+    Frame 'seq' (1, 2, ...) is written to slot seq % slots. Each slot starts with its seq twice:
+    'begin' is set before the data is written and 'end' after it, so a reader that finds the same
+    seq in both got a frame that was not being overwritten while it read it (seqlock). Readers get
+    a memoryview into the ring, no copy; it stays valid until the writer laps the ring, i.e. for
+    slots - 1 newer frames, and valid(seq) tells whether it still is.
+    """
+
+    HEADER  = Struct("<IIQ")        # slots, slot size, latest seq (0: no frame yet)
+    SLOT    = Struct("<QdIxxxxQ")   # begin seq, timestamp, length, end seq
+
+    def __init__(self, name:str=None, slots=4, slot_size=512*1024):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER.size + slots * (self.SLOT.size + slot_size))
+            self.HEADER.pack_into(self.shm.buf, 0, slots, slot_size, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.name = self.shm.name
+        self.slots, self.slot_size, _ = self.HEADER.unpack_from(self.shm.buf, 0)
+
+    def offset(self, seq) -> int:
+        return self.HEADER.size + (seq % self.slots) * (self.SLOT.size + self.slot_size)
+
+    def latest(self) -> int:
+        return self.HEADER.unpack_from(self.shm.buf, 0)[2]
+
+    def write(self, data, timestamp:float) -> int:
+        """Publishes one frame, returns its seq (0 if it does not fit in a slot)."""
+        if len(data) > self.slot_size:
+            print(f"[!]: Frame of {len(data)} bytes dropped, ring slots are {self.slot_size} bytes")
+            return 0
+
+        buf = self.shm.buf
+        seq = self.latest() + 1
+        offset = self.offset(seq)
+        start = offset + self.SLOT.size
+
+        self.SLOT.pack_into(buf, offset, seq, timestamp, len(data), 0)
+        buf[start: start + len(data)] = data
+        self.SLOT.pack_into(buf, offset, seq, timestamp, len(data), seq)
+        self.HEADER.pack_into(buf, 0, self.slots, self.slot_size, seq)
+
+        return seq
+
+    def read(self, seq:int=None):
+        """Returns frame 'seq' (the latest by default) as (seq, timestamp, memoryview), or (0, 0.0, None)
+        if there is no frame yet or it has been overwritten."""
+        for _ in range(3):
+            latest = self.latest() if seq is None else seq
+            if not latest:
+                break
+
+            offset = self.offset(latest)
+            begin, timestamp, length, end = self.SLOT.unpack_from(self.shm.buf, offset)
+            if begin == end == latest:
+                start = offset + self.SLOT.size
+                return latest, timestamp, self.shm.buf[start: start + length]
+
+            if seq is not None:
+                break
+
+        return 0, 0.0, None
+
+    def valid(self, seq:int) -> bool:
+        "Whether frame 'seq' is still in the ring (a view returned by read() is still intact)."
+        begin, _, _, end = self.SLOT.unpack_from(self.shm.buf, self.offset(seq))
+        return begin == end == seq
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # Views handed out by read() are still alive, the mapping goes with the process.
+
+    def unlink(self):
+        self.shm.unlink()
@@ -0,0 +1,94 @@
+class Quality_Governor():
+    """Closed-loop JPEG quality / preview resolution control holding a target frame latency.
+
+    The client reports, for the last preview frame it decoded, its age when received (see
+    Client.get_jpg) and the time it took to decode it. Their sum is smoothed (EWMA) and compared
+    with the target: above it quality is lowered, below it raised, one step at a time and at most
+    every 'hold' reports. Once quality is pinned at a bound the preview resolution moves one size
+    along 'sizes' instead (less often, since it restarts the camera) and quality restarts from the
+    middle of its range.
+    """
+
+    def __init__(self, quality=50, size=(320,240), target=0.1, quality_range=(20, 80), step=5,
+                 sizes=((160,120), (320,240), (640,480)), hysteresis=0.2, alpha=0.3, hold=3, size_hold=30):
+        """
+        Arguments:
+          quality:        starting JPEG quality.
+          size:           starting preview size, None if the resolution must not change.
+          target:         frame latency (age + decode) to hold, in seconds.
+          quality_range:  (min, max) JPEG quality.
+          step:           quality change per adjustment.
+          sizes:          allowed preview sizes, smallest first.
+          hysteresis:     dead band around the target, as a fraction of it.
+          alpha:          EWMA weight of the newest report.
+          hold:           reports between quality changes.
+          size_hold:      reports between resolution changes.
+        """
+        self.quality        = quality
+        self.size           = tuple(size) if size else None
+        self.target         = target
+        self.quality_range  = quality_range
+        self.step           = step
+        self.sizes          = [tuple(s) for s in sizes]
+        self.hysteresis     = hysteresis
+        self.alpha          = alpha
+        self.hold           = hold
+        self.size_hold      = size_hold
+
+        self.latency        = None      # Smoothed frame age + decode time.
+        self.reports        = 0
+        self.last_change    = -hold
+        self.last_resize    = -size_hold
+        self.changes        = 0
+
+    def update(self, age:float, decode:float=0.0):
+        """Feeds one client report.
+
+        Arguments:
+          age:    seconds between the encoding of the frame and its reception.
+          decode: seconds the client took to decode it.
+
+        Returns:
+          (quality, size) to apply if either changed, else None.
+        """
+        sample = age + decode
+        self.latency = sample if self.latency is None else self.alpha*sample + (1 - self.alpha)*self.latency
+        self.reports += 1
+
+        if self.reports - self.last_change < self.hold:
+            return None
+
+        if self.latency > self.target * (1 + self.hysteresis):
+            direction = -1
+        elif self.latency < self.target * (1 - self.hysteresis):
+            direction = 1
+        else:
+            return None
+
+        low, high = self.quality_range
+        quality = min(max(self.quality + direction*self.step, low), high)
+        size = self.size
+
+        if quality == self.quality:
+            # Quality is at its bound, move the resolution instead.
+            if self.size not in self.sizes or self.reports - self.last_resize < self.size_hold:
+                return None
+
+            index = self.sizes.index(self.size) + direction
+            if not 0 <= index < len(self.sizes):
+                return None
+
+            size = self.sizes[index]
+            quality = (low + high) // 2
+            self.last_resize = self.reports
+
+        self.quality, self.size = quality, size
+        self.last_change = self.reports
+        self.changes += 1
+
+        return self.quality, self.size
+
+    def settings(self) -> dict:
+        "Current settings and state, for instrumentation."
+        return {"quality": self.quality, "size": self.size, "latency": self.latency, "target": self.target,
+                "quality_range": self.quality_range, "sizes": self.sizes, "reports": self.reports, "changes": self.changes}
@@ -0,0 +1,171 @@
+import time, queue, threading
+
+from bus_arbiter import CONTROL, priority_of
+
+
+# Motor IDs of the hand.
+HINCH       = 0
+L_AND_R     = 1
+MIDDLE      = 2
+INDEX       = 3
+THUMB       = 4
+
+# Grasp macros: name -> steps, run in order. A step is one of
+#   {"do": Controller method, "goal": goal(s), "ids": motor IDs}   e.g. switch_mode, set_motor_pwm.
+#   {"delay": seconds}
+#   {"until": register of get_state(), "ids": motor IDs, "above"/"below": value, "timeout": seconds}
+#       waits until the register of every listed motor passes the value, the grasp fails on timeout.
+GRASPS = {
+    "power": [
+        {"do": "switch_mode", "goal": 2},
+        {"do": "set_sync_motor_pwm", "goal": [35, 20, -40, 20, 20], "ids": [HINCH, THUMB, L_AND_R, MIDDLE, INDEX]},
+    ],
+    "tripod": [
+        {"do": "switch_mode", "goal": 2},
+        {"do": "set_sync_motor_pwm", "goal": [30, 30, 30], "ids": [HINCH, MIDDLE, INDEX]},
+        {"delay": 2},
+        {"do": "set_motor_pwm", "goal": 20, "ids": [THUMB]},
+    ],
+    "pinch": [
+        {"do": "switch_mode", "goal": 2},
+        {"do": "set_sync_motor_pwm", "goal": [30, 30], "ids": [HINCH, INDEX]},
+        {"delay": 2},
+        {"do": "set_motor_pwm", "goal": 20, "ids": [THUMB]},
+    ],
+    "close": [
+        {"do": "switch_mode", "goal": 2, "ids": [L_AND_R, MIDDLE, INDEX]},
+        {"do": "set_sync_motor_pwm", "goal": [-40, 30, 40], "ids": [L_AND_R, MIDDLE, INDEX]},
+    ],
+}
+
+
+class Grasp_Engine():
+    """Runs grasp macros (see GRASPS) on a scheduler thread next to the command loop.
+
+    start() queues a macro and returns at once, so the client sends one command per grasp instead
+    of one per step, and delays no longer block anyone. Each step is a Bus_Arbiter transaction, so
+    steps interleave with the commands of the main loop instead of colliding with them.
+    Starting a grasp (or cancel()) stops the one running at its next step or poll. With a
+    Control_Loop, goal steps only update its goals and conditions read its last state.
+
+    Progress goes to publish(event) as dicts: {"grasp", "run", "state", "step", "steps", "detail",
+    "time"}, state being "started", "step", "done", "failed" or "cancelled".
+    """
+
+    def __init__(self, ctl, bus, publish=None, grasps:dict=None, poll=0.02, loop=None):
+        """
+        Arguments:
+          ctl:     Controller the steps run on.
+          bus:     Bus_Arbiter of the Controller's bus.
+          publish: called with every progress event (from the scheduler thread).
+          grasps:  name -> steps, GRASPS by default.
+          poll:    seconds between reads of an "until" condition.
+          loop:    Control_Loop serving the goal steps and the conditions, None to use the bus directly.
+        """
+        self.ctl        = ctl
+        self.bus        = bus
+        self.publish    = publish
+        self.grasps     = GRASPS if grasps is None else grasps
+        self.poll       = poll
+        self.loop       = loop
+
+        self.queue      = queue.Queue()
+        self.runs       = 0
+        self.active     = None      # Run that may go on, any other one stops.
+
+        self.thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.thread.start()
+
+    def start(self, name:str) -> int:
+        "Queues grasp 'name', stopping the one running, and returns its run number."
+        if name not in self.grasps:
+            raise KeyError(f"Unknown grasp '{name}', use one of {list(self.grasps)}")
+
+        self.runs += 1
+        self.active = self.runs
+        self.queue.put((self.runs, name))
+        return self.runs
+
+    def cancel(self):
+        self.active = None
+
+    def stop(self):
+        self.cancel()
+        self.queue.put(None)
+
+    def run_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            run, name = item
+            if run == self.active:
+                self.execute(run, name)
+
+    def execute(self, run:int, name:str):
+        steps = self.grasps[name]
+        self.event(run, name, "started", 0, len(steps))
+
+        for index, step in enumerate(steps, 1):
+            if run != self.active:
+                self.event(run, name, "cancelled", index - 1, len(steps))
+                return
+
+            try:
+                detail = self.run_step(run, step)
+            except Exception as e:
+                self.event(run, name, "failed", index, len(steps), f"{e}")
+                return
+
+            if run != self.active:      # Stopped during a delay or a wait.
+                self.event(run, name, "cancelled", index - 1, len(steps))
+                return
+
+            self.event(run, name, "step", index, len(steps), detail)
+
+        self.event(run, name, "done", len(steps), len(steps))
+
+    def run_step(self, run:int, step:dict) -> str:
+        "Runs one step, returns a description of its outcome."
+        if "delay" in step:
+            end = time.time() + step["delay"]
+            while time.time() < end and run == self.active:
+                time.sleep(min(self.poll, max(0.0, end - time.time())))
+            return f"waited {step['delay']} s"
+
+        if "until" in step:
+            return self.wait_until(run, step)
+
+        if self.loop is not None and step["do"] in self.loop.COMMANDS:
+            result = getattr(self.loop, step["do"])(step.get("goal"), step.get("ids"))
+        else:
+            with self.bus.transaction(priority_of(step["do"])):
+                result = getattr(self.ctl, step["do"])(step.get("goal"), step.get("ids"))
+        return f"{step['do']} -> {result}"
+
+    def wait_until(self, run:int, step:dict) -> str:
+        register, ids = step["until"], step.get("ids")
+        end = time.time() + step.get("timeout", 5.0)
+
+        while run == self.active:
+            if self.loop is not None:
+                state = self.loop.get_state(ids)
+            else:
+                state = self.bus.get_state(ids, CONTROL)
+
+            values = state[register]
+            if len(values) and (("above" not in step or (values > step["above"]).all()) and
+                                ("below" not in step or (values < step["below"]).all())):
+                return f"{register} = {values.tolist()}"
+
+            if time.time() > end:
+                raise TimeoutError(f"{register} = {values.tolist()} after {step.get('timeout', 5.0)} s")
+            time.sleep(self.poll)
+
+        return "cancelled"
+
+    def event(self, run, name, state, step, steps, detail=""):
+        if self.publish:
+            self.publish({"grasp": name, "run": run, "state": state, "step": step, "steps": steps,
+                          "detail": detail, "time": time.time()})
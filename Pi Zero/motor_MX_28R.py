@@ -18,6 +18,24 @@ class MX_28R:
     ADDR_MX_BAUDRATE            = 8                 # Control address for setting a baudrate.
     ADDR_MX_VOLTAGE_INPUT       = 144               # Control address for setting a voltage input.
     ADDR_MX_PRESENT_LOAD        = 126               # Control address for setting a present load.
+    ADDR_MX_PRESENT_VELOCITY    = 128               # Control address for getting current velocity.
+    ADDR_MX_PRESENT_TEMPERATURE = 146               # Control address for getting current temperature.
+    ADDR_MX_MODEL_NUMBER        = 0                 # Control address for getting the model number. (2 bytes)
+    ADDR_MX_FIRMWARE_VERSION    = 6                 # Control address for getting the firmware version.
+    ADDR_MX_INDIRECT_ADDRESS    = 168               # Indirect Address 1 (2 bytes each, 1-28).
+    ADDR_MX_INDIRECT_DATA       = 224               # Indirect Data 1 (1 byte each, 1-28).
+    MAX_INDIRECT                = 28                # Number of Indirect Address/Data pairs in 168-251.
+
+    # Registers by name: (address, struct format, dtype of the converted value).
+    REGISTERS = {
+        "mode":         (ADDR_MX_MODE,                  "B", "i1"),
+        "torque":       (ADDR_MX_TORQUE_ENABLE,         "B", "u1"),
+        "load":         (ADDR_MX_PRESENT_LOAD,          "h", "f8"),
+        "velocity":     (ADDR_MX_PRESENT_VELOCITY,      "i", "f8"),
+        "position":     (ADDR_MX_PRESENT_POSITION,      "i", "f8"),
+        "voltage":      (ADDR_MX_VOLTAGE_INPUT,         "H", "f8"),
+        "temperature":  (ADDR_MX_PRESENT_TEMPERATURE,   "B", "u1"),
+    }
 
     # Operating modes
     MODE_POSITION               = 4                 # Operating mode setting for enabling the Position mode.
@@ -35,6 +53,7 @@ class MX_28R:
     MAX_PWM                     = 885    
     MAX_VEL                     = 1023              # Maximum speed [0-1023] (0-229rpm)
     MAX_RPM                     = 229
+    RPM_UNIT                    = 0.229             # Present velocity unit [rpm].
 
     def __init__(self, _portHandler:PortHandler, _packetHandler:Protocol_Handler, _id:int):
         self.portHandler    = _portHandler
@@ -79,25 +98,28 @@ class MX_28R:
     def set_mode(self, mode) -> bool:
         "mode: int -> 0: Position, 1: Velocity, 2: PWM"
 
-        selected = [self.MODE_POSITION, self.MODE_VELOCITY, self.MODE_PWM][mode] # 4 for Multi-turn | 16 for PWM
+        selected = self.mode_to_raw(mode) # 4 for Multi-turn | 16 for PWM
         return self.safe_command(self.packetHandler.write1ByteTxRx, self.portHandler, self.id, self.ADDR_MX_MODE, selected)
     
     def get_mode(self):
         result, dxl_mode = self.safe_command(self.packetHandler.read1ByteTxRx, self.portHandler, self.id, self.ADDR_MX_MODE)
-        mode = [self.MODE_POSITION, self.MODE_VELOCITY, self.MODE_PWM].index(dxl_mode)
+        mode = self.raw_to_mode(dxl_mode)
 
         return mode if result else None
     
     def get_voltage(self):
         result, dxl_volt = self.safe_command(self.packetHandler.read2ByteTxRx, self.portHandler, self.id, self.ADDR_MX_VOLTAGE_INPUT)
-        return dxl_volt/10 if result else None
+        return self.raw_to_voltage(dxl_volt) if result else None
     
     def get_load(self):
-        result, dxl_load = self.safe_command(self.packetHandler.read2ByteTxRx, self.portHandler, self.id, self.ADDR_MX_PRESENT_LOAD)
-        if dxl_load > 1000:
-            dxl_load = 65_535 - dxl_load
+        "Present load in % of max torque, whichever the direction (see get_signed_load)."
+        load = self.get_signed_load()
+        return abs(load) if load is not None else None
 
-        return dxl_load/10 if result else None
+    def get_signed_load(self):
+        "Present load in % of max torque, negative when opening."
+        result, dxl_load = self.safe_command(self.packetHandler.read2ByteTxRx, self.portHandler, self.id, self.ADDR_MX_PRESENT_LOAD)
+        return self.raw_to_load(dxl_load) if result else None
 
     def get_motor_position(self):
         """
@@ -106,7 +128,7 @@ class MX_28R:
           position: Current motor position in degrees.
         """
         result, position_scaled = self.safe_command(self.packetHandler.read2ByteTxRx, self.portHandler, self.id, self.ADDR_MX_PRESENT_POSITION)
-        position = round(interp(position_scaled, [-self.MAX_GOAL, self.MAX_GOAL], [-self.MAX_REVOLUTIONS*360,self.MAX_REVOLUTIONS*360]),2)
+        position = self.raw_to_position(position_scaled)
         return position if result else None
     
     def get_velocity_limit(self):
@@ -121,17 +143,73 @@ class MX_28R:
         return position_scaled if result else None
 
     def set_motor_position(self, goal) -> bool:
-        goal_scaled = round(interp(goal, [-self.MAX_REVOLUTIONS*360,self.MAX_REVOLUTIONS*360], [-self.MAX_GOAL, self.MAX_GOAL]))
+        goal_scaled = self.position_to_raw(goal)
         return self.safe_command(self.packetHandler.write4ByteTxRx, self.portHandler, self.id, self.ADDR_MX_GOAL_POS, goal_scaled)
 
     def set_motor_velocity(self, goal) -> bool:
-        goal_scaled = round(interp(goal, [-self.MAX_RPM,self.MAX_RPM], [-self.MAX_VEL, self.MAX_VEL]))
+        goal_scaled = self.velocity_to_raw(goal)
         return self.safe_command(self.packetHandler.write4ByteTxRx, self.portHandler, self.id, self.ADDR_MX_GOAL_VEL, goal_scaled)
     
     def set_motor_pwm(self, goal) -> bool:
-        goal_scaled = round(goal/100*self.MAX_PWM)
+        goal_scaled = self.pwm_to_raw(goal)
         return self.safe_command(self.packetHandler.write2ByteTxRx, self.portHandler, self.id, self.ADDR_MX_GOAL_PWM, goal_scaled)
 
+    @classmethod
+    def mode_to_raw(cls, mode) -> int:
+        "mode: int -> 0: Position, 1: Velocity, 2: PWM"
+        return [cls.MODE_POSITION, cls.MODE_VELOCITY, cls.MODE_PWM][mode]
+
+    @classmethod
+    def position_to_raw(cls, goal) -> int:
+        "goal: degrees -> Goal Position register value."
+        return round(interp(goal, [-cls.MAX_REVOLUTIONS*360,cls.MAX_REVOLUTIONS*360], [-cls.MAX_GOAL, cls.MAX_GOAL]))
+
+    @classmethod
+    def velocity_to_raw(cls, goal) -> int:
+        "goal: rpm -> Goal Velocity register value."
+        return round(interp(goal, [-cls.MAX_RPM,cls.MAX_RPM], [-cls.MAX_VEL, cls.MAX_VEL]))
+
+    @classmethod
+    def pwm_to_raw(cls, goal) -> int:
+        "goal: 0-100% pwm -> Goal PWM register value."
+        return round(goal/100*cls.MAX_PWM)
+
+    @classmethod
+    def raw_to_mode(cls, raw) -> int:
+        "Operating Mode register value -> 0: Position, 1: Velocity, 2: PWM (-1 for any other mode)."
+        modes = [cls.MODE_POSITION, cls.MODE_VELOCITY, cls.MODE_PWM]
+        return modes.index(raw) if raw in modes else -1
+
+    @classmethod
+    def raw_to_position(cls, raw):
+        "Present Position register value -> degrees (works on arrays too)."
+        return interp(raw, [-cls.MAX_GOAL, cls.MAX_GOAL], [-cls.MAX_REVOLUTIONS*360,cls.MAX_REVOLUTIONS*360]).round(2)
+
+    @classmethod
+    def raw_to_velocity(cls, raw):
+        "Present Velocity register value -> rpm."
+        return raw * cls.RPM_UNIT
+
+    @classmethod
+    def raw_to_load(cls, raw):
+        "Present Load register value (signed 16 bit, or read as unsigned) -> % of max torque, negative when opening."
+        if raw > 32_767:
+            raw -= 65_536
+
+        return raw/10
+
+    @classmethod
+    def raw_to_voltage(cls, raw):
+        "Present Input Voltage register value -> V."
+        return raw/10
+
+    @classmethod
+    def from_raw(cls, name, raw):
+        "Converts a raw value of one of REGISTERS to its unit."
+        convert = {"mode": cls.raw_to_mode, "load": cls.raw_to_load, "velocity": cls.raw_to_velocity,
+                   "position": cls.raw_to_position, "voltage": cls.raw_to_voltage}.get(name)
+        return convert(raw) if convert else raw
+
     def set_motor_baudrate(self, baud) -> bool:
         if baud == 57600:
             baud_mode = self.BAUD_57600
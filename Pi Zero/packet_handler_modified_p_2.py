@@ -2,16 +2,11 @@
 
 from dynamixel_sdk.robotis_def import *
 
-import RPi.GPIO as GPIO # type: ignore
-from time import sleep
+import re, select, threading
+from collections import deque
+from struct import Struct
 
-
-RTS_PIN     = 17
-EXTRA_BYTES = 3
-
-GPIO.setwarnings(False)
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(RTS_PIN, GPIO.OUT)
+from direction_control import GPIO_Direction
 
 
 TXPACKET_MAX_LEN = 1 * 1024
@@ -29,6 +24,8 @@ PKT_INSTRUCTION = 7
 PKT_ERROR = 8
 PKT_PARAMETER0 = 8
 
+INST_FAST_SYNC_READ = 0x8A  # Not defined by older dynamixel_sdk releases.
+
 # Protocol 2.0 Error bit
 ERRNUM_RESULT_FAIL = 1  # Failed to process the instruction packet.
 ERRNUM_INSTRUCTION = 2  # Instruction error
@@ -40,11 +37,183 @@ ERRNUM_ACCESS = 7  # Access error
 
 ERRBIT_ALERT = 128  # When the device has a problem, this bit is set to 1. Check "Device Status Check" value.
 
+# CRC-16 (IBM/ANSI, poly 0x8005) lookup table, built once instead of on every updateCRC call.
+CRC_TABLE = (0x0000,
+             0x8005, 0x800F, 0x000A, 0x801B, 0x001E, 0x0014, 0x8011,
+             0x8033, 0x0036, 0x003C, 0x8039, 0x0028, 0x802D, 0x8027,
+             0x0022, 0x8063, 0x0066, 0x006C, 0x8069, 0x0078, 0x807D,
+             0x8077, 0x0072, 0x0050, 0x8055, 0x805F, 0x005A, 0x804B,
+             0x004E, 0x0044, 0x8041, 0x80C3, 0x00C6, 0x00CC, 0x80C9,
+             0x00D8, 0x80DD, 0x80D7, 0x00D2, 0x00F0, 0x80F5, 0x80FF,
+             0x00FA, 0x80EB, 0x00EE, 0x00E4, 0x80E1, 0x00A0, 0x80A5,
+             0x80AF, 0x00AA, 0x80BB, 0x00BE, 0x00B4, 0x80B1, 0x8093,
+             0x0096, 0x009C, 0x8099, 0x0088, 0x808D, 0x8087, 0x0082,
+             0x8183, 0x0186, 0x018C, 0x8189, 0x0198, 0x819D, 0x8197,
+             0x0192, 0x01B0, 0x81B5, 0x81BF, 0x01BA, 0x81AB, 0x01AE,
+             0x01A4, 0x81A1, 0x01E0, 0x81E5, 0x81EF, 0x01EA, 0x81FB,
+             0x01FE, 0x01F4, 0x81F1, 0x81D3, 0x01D6, 0x01DC, 0x81D9,
+             0x01C8, 0x81CD, 0x81C7, 0x01C2, 0x0140, 0x8145, 0x814F,
+             0x014A, 0x815B, 0x015E, 0x0154, 0x8151, 0x8173, 0x0176,
+             0x017C, 0x8179, 0x0168, 0x816D, 0x8167, 0x0162, 0x8123,
+             0x0126, 0x012C, 0x8129, 0x0138, 0x813D, 0x8137, 0x0132,
+             0x0110, 0x8115, 0x811F, 0x011A, 0x810B, 0x010E, 0x0104,
+             0x8101, 0x8303, 0x0306, 0x030C, 0x8309, 0x0318, 0x831D,
+             0x8317, 0x0312, 0x0330, 0x8335, 0x833F, 0x033A, 0x832B,
+             0x032E, 0x0324, 0x8321, 0x0360, 0x8365, 0x836F, 0x036A,
+             0x837B, 0x037E, 0x0374, 0x8371, 0x8353, 0x0356, 0x035C,
+             0x8359, 0x0348, 0x834D, 0x8347, 0x0342, 0x03C0, 0x83C5,
+             0x83CF, 0x03CA, 0x83DB, 0x03DE, 0x03D4, 0x83D1, 0x83F3,
+             0x03F6, 0x03FC, 0x83F9, 0x03E8, 0x83ED, 0x83E7, 0x03E2,
+             0x83A3, 0x03A6, 0x03AC, 0x83A9, 0x03B8, 0x83BD, 0x83B7,
+             0x03B2, 0x0390, 0x8395, 0x839F, 0x039A, 0x838B, 0x038E,
+             0x0384, 0x8381, 0x0280, 0x8285, 0x828F, 0x028A, 0x829B,
+             0x029E, 0x0294, 0x8291, 0x82B3, 0x02B6, 0x02BC, 0x82B9,
+             0x02A8, 0x82AD, 0x82A7, 0x02A2, 0x82E3, 0x02E6, 0x02EC,
+             0x82E9, 0x02F8, 0x82FD, 0x82F7, 0x02F2, 0x02D0, 0x82D5,
+             0x82DF, 0x02DA, 0x82CB, 0x02CE, 0x02C4, 0x82C1, 0x8243,
+             0x0246, 0x024C, 0x8249, 0x0258, 0x825D, 0x8257, 0x0252,
+             0x0270, 0x8275, 0x827F, 0x027A, 0x826B, 0x026E, 0x0264,
+             0x8261, 0x0220, 0x8225, 0x822F, 0x022A, 0x823B, 0x023E,
+             0x0234, 0x8231, 0x8213, 0x0216, 0x021C, 0x8219, 0x0208,
+             0x820D, 0x8207, 0x0202)
+
+# Little-endian field layouts used to encode/decode packets in place.
+HEADER_STRUCT   = Struct("<BBBBBHB")   # HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH INST
+WORD_STRUCT     = Struct("<H")
+DWORD_STRUCT    = Struct("<I")
+ADDR_LEN_STRUCT = Struct("<HH")        # START_ADDR DATA_LEN
+
+# Header byte stuffing (FF FF FD inside a packet is sent as FF FF FD FD).
+HEADER_BYTES            = b"\xFF\xFF\xFD"
+STUFFED_HEADER_BYTES    = b"\xFF\xFF\xFD\xFD"
+STUFFING_PATTERN        = re.compile(re.escape(HEADER_BYTES))
+STUFFED_PATTERN         = re.compile(re.escape(STUFFED_HEADER_BYTES))
+
+
+class StatusPacketParser(object):
+    """Incremental Protocol 2.0 status packet parser.
+
+    Received bytes are fed in as they arrive and parsed over a fixed buffer used as a ring:
+    the header search resumes where it stopped, consumed bytes are reclaimed by moving the
+    unread tail back to the front, and every packet whose header, length and CRC check out
+    is queued in 'packets' as soon as its last byte is in. Several status packets arriving
+    back to back (sync/bulk read, ping replies) are therefore split in a single pass.
+    Fast Sync Read replies come from the broadcast ID, which is accepted as well.
+    """
+
+    def __init__(self, updateCRC, size=4 * RXPACKET_MAX_LEN):
+        self.updateCRC  = updateCRC
+        self.buffer     = bytearray(size)
+        self.view       = memoryview(self.buffer)
+        self.packets    = deque()   # (rxpacket, result) in arrival order
+
+        self.reset()
+
+    def reset(self):
+        self.start          = 0     # first byte not parsed yet
+        self.end            = 0     # one past the last received byte
+        self.wait_length    = 0     # length of the packet at 'start', 0 while looking for a header
+        self.packets.clear()
+
+    def pending(self):
+        "Number of received bytes not yet returned as a packet."
+        return self.end - self.start
+
+    def free(self):
+        return len(self.buffer) - self.pending()
+
+    def feed(self, data):
+        n = len(data)
+        if not n:
+            return len(self.packets)
+
+        if self.end + n > len(self.buffer):
+            # Wrap around: slide the unread tail back to the front of the buffer.
+            pending = self.pending()
+            self.buffer[0: pending] = self.buffer[self.start: self.end]
+            self.start, self.end = 0, pending
+
+            if n > self.free():  # Overrun, keep the newest bytes.
+                self.reset()
+                data = data[-len(self.buffer):]
+                n = len(data)
+
+        self.buffer[self.end: self.end + n] = data
+        self.end += n
+
+        self.parse()
+        return len(self.packets)
+
+    def parse(self):
+        buffer = self.buffer
+
+        while True:
+            if not self.wait_length:
+                # find packet header
+                idx = buffer.find(HEADER_BYTES, self.start, self.end)
+                if idx < 0:
+                    self.start = max(self.start, self.end - 2)  # A header may be split across reads.
+                    return
+
+                self.start = idx
+                if self.end - idx <= PKT_INSTRUCTION:
+                    return
+
+                length = DXL_MAKEWORD(buffer[idx + PKT_LENGTH_L], buffer[idx + PKT_LENGTH_H])
+                dxl_id = buffer[idx + PKT_ID]
+                if (buffer[idx + PKT_RESERVED] != 0x00) or (dxl_id > 0xFC and dxl_id != BROADCAST_ID) or (
+                        length > RXPACKET_MAX_LEN) or (length < 4) or (buffer[idx + PKT_INSTRUCTION] != 0x55):
+                    # Not a status packet header (or a stuffed FF FF FD FD), skip it.
+                    self.start = idx + 1
+                    continue
+
+                self.wait_length = length + PKT_LENGTH_H + 1
+
+            if self.end - self.start < self.wait_length:
+                return
+
+            start, wait_length = self.start, self.wait_length
+            self.wait_length = 0
+
+            crc, = WORD_STRUCT.unpack_from(buffer, start + wait_length - 2)
+            if self.updateCRC(0, self.view[start: start + wait_length - 2], wait_length - 2) == crc:
+                self.packets.append((bytes(buffer[start: start + wait_length]), COMM_SUCCESS))
+                self.start = start + wait_length
+            else:
+                self.packets.append((bytes(buffer[start: start + wait_length]), COMM_RX_CORRUPT))
+                self.start = start + 1  # Resync right after the bad header.
+
 
 class Protocol2PacketHandler(object):
-    def __init__(self, baud):
+    """Protocol 2.0 packet handler encoding into a reusable tx buffer.
+
+    Each thread encodes into its own buffer, so a thread finding the port in use gets COMM_PORT_BUSY
+    from txPacket() instead of overwriting the packet of the thread that holds it. The receive
+    parser is only used while holding the port. 'port.is_using' is still not an atomic lock:
+    threads sharing the bus should take turns (see bus_arbiter.Bus_Arbiter).
+    """
+
+    def __init__(self, baud, direction=None):
         self.BAUDRATE = baud
-        self.extra_bytes = EXTRA_BYTES
+
+        # Half-duplex direction control, set up for the port on its first packet (see direction_control).
+        self.direction = direction if direction is not None else GPIO_Direction(baud)
+
+        # Every instruction is encoded into a buffer of its thread (see txview()) instead of a fresh list per call.
+        self.local = threading.local()
+
+        self.parser = StatusPacketParser(self.updateCRC)
+
+        # Receive loops sleep in select() until bytes arrive, instead of polling the port.
+        self.select_rx = True
+
+    def txview(self) -> memoryview:
+        "Tx buffer of the calling thread."
+        try:
+            return self.local.txview
+        except AttributeError:
+            self.local.txview = memoryview(bytearray(TXPACKET_MAX_LEN))
+            return self.local.txview
 
     def getProtocolVersion(self):
         return 2.0
@@ -103,116 +272,110 @@ class Protocol2PacketHandler(object):
             return "[RxPacketError] Unknown error code!"
 
     def updateCRC(self, crc_accum, data_blk_ptr, data_blk_size):
-        crc_table = [0x0000,
-                     0x8005, 0x800F, 0x000A, 0x801B, 0x001E, 0x0014, 0x8011,
-                     0x8033, 0x0036, 0x003C, 0x8039, 0x0028, 0x802D, 0x8027,
-                     0x0022, 0x8063, 0x0066, 0x006C, 0x8069, 0x0078, 0x807D,
-                     0x8077, 0x0072, 0x0050, 0x8055, 0x805F, 0x005A, 0x804B,
-                     0x004E, 0x0044, 0x8041, 0x80C3, 0x00C6, 0x00CC, 0x80C9,
-                     0x00D8, 0x80DD, 0x80D7, 0x00D2, 0x00F0, 0x80F5, 0x80FF,
-                     0x00FA, 0x80EB, 0x00EE, 0x00E4, 0x80E1, 0x00A0, 0x80A5,
-                     0x80AF, 0x00AA, 0x80BB, 0x00BE, 0x00B4, 0x80B1, 0x8093,
-                     0x0096, 0x009C, 0x8099, 0x0088, 0x808D, 0x8087, 0x0082,
-                     0x8183, 0x0186, 0x018C, 0x8189, 0x0198, 0x819D, 0x8197,
-                     0x0192, 0x01B0, 0x81B5, 0x81BF, 0x01BA, 0x81AB, 0x01AE,
-                     0x01A4, 0x81A1, 0x01E0, 0x81E5, 0x81EF, 0x01EA, 0x81FB,
-                     0x01FE, 0x01F4, 0x81F1, 0x81D3, 0x01D6, 0x01DC, 0x81D9,
-                     0x01C8, 0x81CD, 0x81C7, 0x01C2, 0x0140, 0x8145, 0x814F,
-                     0x014A, 0x815B, 0x015E, 0x0154, 0x8151, 0x8173, 0x0176,
-                     0x017C, 0x8179, 0x0168, 0x816D, 0x8167, 0x0162, 0x8123,
-                     0x0126, 0x012C, 0x8129, 0x0138, 0x813D, 0x8137, 0x0132,
-                     0x0110, 0x8115, 0x811F, 0x011A, 0x810B, 0x010E, 0x0104,
-                     0x8101, 0x8303, 0x0306, 0x030C, 0x8309, 0x0318, 0x831D,
-                     0x8317, 0x0312, 0x0330, 0x8335, 0x833F, 0x033A, 0x832B,
-                     0x032E, 0x0324, 0x8321, 0x0360, 0x8365, 0x836F, 0x036A,
-                     0x837B, 0x037E, 0x0374, 0x8371, 0x8353, 0x0356, 0x035C,
-                     0x8359, 0x0348, 0x834D, 0x8347, 0x0342, 0x03C0, 0x83C5,
-                     0x83CF, 0x03CA, 0x83DB, 0x03DE, 0x03D4, 0x83D1, 0x83F3,
-                     0x03F6, 0x03FC, 0x83F9, 0x03E8, 0x83ED, 0x83E7, 0x03E2,
-                     0x83A3, 0x03A6, 0x03AC, 0x83A9, 0x03B8, 0x83BD, 0x83B7,
-                     0x03B2, 0x0390, 0x8395, 0x839F, 0x039A, 0x838B, 0x038E,
-                     0x0384, 0x8381, 0x0280, 0x8285, 0x828F, 0x028A, 0x829B,
-                     0x029E, 0x0294, 0x8291, 0x82B3, 0x02B6, 0x02BC, 0x82B9,
-                     0x02A8, 0x82AD, 0x82A7, 0x02A2, 0x82E3, 0x02E6, 0x02EC,
-                     0x82E9, 0x02F8, 0x82FD, 0x82F7, 0x02F2, 0x02D0, 0x82D5,
-                     0x82DF, 0x02DA, 0x82CB, 0x02CE, 0x02C4, 0x82C1, 0x8243,
-                     0x0246, 0x024C, 0x8249, 0x0258, 0x825D, 0x8257, 0x0252,
-                     0x0270, 0x8275, 0x827F, 0x027A, 0x826B, 0x026E, 0x0264,
-                     0x8261, 0x0220, 0x8225, 0x822F, 0x022A, 0x823B, 0x023E,
-                     0x0234, 0x8231, 0x8213, 0x0216, 0x021C, 0x8219, 0x0208,
-                     0x820D, 0x8207, 0x0202]
-
-        for j in range(0, data_blk_size):
-            i = ((crc_accum >> 8) ^ data_blk_ptr[j]) & 0xFF
-            crc_accum = ((crc_accum << 8) ^ crc_table[i]) & 0xFFFF
+        crc_table = CRC_TABLE
+
+        for byte in data_blk_ptr[:data_blk_size]:
+            crc_accum = ((crc_accum << 8) ^ crc_table[((crc_accum >> 8) ^ byte) & 0xFF]) & 0xFFFF
 
         return crc_accum
 
     def addStuffing(self, packet):
+        """Byte stuffing for header: every FF FF FD after the header gets an extra 0xFD.
+
+        The pattern is searched natively over the packet. When it is absent (almost always)
+        the packet is returned untouched; otherwise a stuffed copy is returned.
+        """
         packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
-        packet_length_out = packet_length_in
+        crc_index = PKT_INSTRUCTION + packet_length_in - 2  # except CRC
 
-        temp = [0] * TXPACKET_MAX_LEN
+        if isinstance(packet, list):
+            packet = bytearray(packet)
 
-        # FF FF FD XX ID LEN_L LEN_H
-        temp[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1] = packet[PKT_HEADER0: PKT_HEADER0 + PKT_LENGTH_H + 1]
+        if STUFFING_PATTERN.search(packet, PKT_INSTRUCTION, crc_index) is None:
+            return packet
 
-        index = PKT_INSTRUCTION
+        stuffed = bytearray(packet[0: PKT_INSTRUCTION])
+        stuffed += bytes(packet[PKT_INSTRUCTION: crc_index]).replace(HEADER_BYTES, STUFFED_HEADER_BYTES)
+        stuffed += packet[crc_index: crc_index + 2]
 
-        for i in range(0, packet_length_in - 2):  # except CRC
-            temp[index] = packet[i + PKT_INSTRUCTION]
-            index = index + 1
-            if packet[i + PKT_INSTRUCTION] == 0xFD \
-                    and packet[i + PKT_INSTRUCTION - 1] == 0xFF \
-                    and packet[i + PKT_INSTRUCTION - 2] == 0xFF:
-                # FF FF FD
-                temp[index] = 0xFD
-                index = index + 1
-                packet_length_out = packet_length_out + 1
+        packet_length_out = len(stuffed) - PKT_INSTRUCTION
+        stuffed[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
+        stuffed[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
-        temp[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        temp[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
-        index = index + 2
+        return stuffed
 
-        if packet_length_in != packet_length_out:
-            packet = [0] * index
+    def removeStuffing(self, packet):
+        """Undoes header stuffing (FF FF FD FD -> FF FF FD); the packet is returned as is when there is none."""
+        packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
+        crc_index = PKT_INSTRUCTION + packet_length_in - 2  # except CRC
 
-        packet[0: index] = temp[0: index]
+        if STUFFED_PATTERN.search(packet, PKT_INSTRUCTION, crc_index) is None:
+            return packet
 
-        packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
-        packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
+        unstuffed = bytearray(packet[0: PKT_INSTRUCTION])
+        unstuffed += bytes(packet[PKT_INSTRUCTION: crc_index]).replace(STUFFED_HEADER_BYTES, HEADER_BYTES)
+        unstuffed += packet[crc_index: crc_index + 2]
 
-        return packet
+        packet_length_out = len(unstuffed) - PKT_INSTRUCTION
+        unstuffed[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
+        unstuffed[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
 
-    def removeStuffing(self, packet):
-        packet_length_in = DXL_MAKEWORD(packet[PKT_LENGTH_L], packet[PKT_LENGTH_H])
-        packet_length_out = packet_length_in
-
-        index = PKT_INSTRUCTION
-        for i in range(0, (packet_length_in - 2)):  # except CRC
-            if (packet[i + PKT_INSTRUCTION] == 0xFD) and (packet[i + PKT_INSTRUCTION + 1] == 0xFD) and (
-                    packet[i + PKT_INSTRUCTION - 1] == 0xFF) and (packet[i + PKT_INSTRUCTION - 2] == 0xFF):
-                # FF FF FD FD
-                packet_length_out = packet_length_out - 1
-            else:
-                packet[index] = packet[i + PKT_INSTRUCTION]
-                index += 1
+        return unstuffed
 
-        packet[index] = packet[PKT_INSTRUCTION + packet_length_in - 2]
-        packet[index + 1] = packet[PKT_INSTRUCTION + packet_length_in - 1]
+    def encodeInstruction(self, dxl_id, instruction, param_length):
+        """Writes an instruction header into the reusable tx buffer of the calling thread.
 
-        packet[PKT_LENGTH_L] = DXL_LOBYTE(packet_length_out)
-        packet[PKT_LENGTH_H] = DXL_HIBYTE(packet_length_out)
+        Arguments:
+          dxl_id:       target ID (or BROADCAST_ID).
+          instruction:  Protocol 2.0 instruction code.
+          param_length: number of parameter bytes the caller will write from PKT_PARAMETER0.
 
-        return packet
+        Returns:
+          txpacket: view over the packet, sized to hold the parameters and the CRC16.
+        """
+        txview = self.txview()
+        HEADER_STRUCT.pack_into(txview, 0, 0xFF, 0xFF, 0xFD, 0x00, dxl_id, param_length + 3, instruction)
+        # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
+        return txview[:param_length + 10]
+
+    def encodeRead(self, instruction, dxl_id, address, length):
+        txpacket = self.encodeInstruction(dxl_id, instruction, 4)
+        ADDR_LEN_STRUCT.pack_into(txpacket, PKT_PARAMETER0, address, length)
+        return txpacket
+
+    def encodeWrite(self, instruction, dxl_id, address, length, data=None):
+        """Encodes a (reg)write header; 'data' is copied in when given, otherwise the caller packs it."""
+        txpacket = self.encodeInstruction(dxl_id, instruction, length + 2)
+        WORD_STRUCT.pack_into(txpacket, PKT_PARAMETER0, address)
+
+        if data is not None:
+            txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = bytes(data[0: length])
+
+        return txpacket
+
+    def encodeSync(self, instruction, start_address, data_length, param, param_length):
+        txpacket = self.encodeInstruction(BROADCAST_ID, instruction, param_length + 4)
+        ADDR_LEN_STRUCT.pack_into(txpacket, PKT_PARAMETER0, start_address, data_length)
+        txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = bytes(param[0: param_length])
+        return txpacket
+
+    def encodeBulk(self, instruction, param, param_length):
+        txpacket = self.encodeInstruction(BROADCAST_ID, instruction, param_length)
+        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + param_length] = bytes(param[0: param_length])
+        return txpacket
 
     def txPacket(self, port, txpacket):
         if port.is_using:
             return COMM_PORT_BUSY
+
+        # Direction control is set up before taking the port: if it fails (no RPi.GPIO off the Pi...)
+        # the port must not stay marked busy for every later transaction.
+        if self.direction.ser is not port.ser:
+            self.direction.begin(port)
         port.is_using = True
 
         # byte stuffing for header
-        self.addStuffing(txpacket)
+        txpacket = self.addStuffing(txpacket)
 
         # check max packet length
         total_packet_length = DXL_MAKEWORD(txpacket[PKT_LENGTH_L], txpacket[PKT_LENGTH_H]) + 7
@@ -235,12 +398,16 @@ class Protocol2PacketHandler(object):
         txpacket[total_packet_length - 1] = DXL_HIBYTE(crc)
 
         # tx packet
-        port.clearPort()
-        GPIO.output(RTS_PIN, GPIO.HIGH)
-        written_packet_length = port.writePort(txpacket)
-        t = (len(txpacket)+self.extra_bytes)*8/self.BAUDRATE
-        sleep(t)
-        GPIO.output(RTS_PIN, GPIO.LOW)
+        try:
+            port.clearPort()
+            self.parser.reset()  # Anything still buffered belongs to an earlier transaction.
+            self.direction.tx()
+            written_packet_length = port.writePort(txpacket)
+            self.direction.sent(total_packet_length)
+        except BaseException:
+            port.is_using = False
+            raise
+
         if total_packet_length != written_packet_length:
             port.is_using = False
             return COMM_TX_FAIL
@@ -248,66 +415,25 @@ class Protocol2PacketHandler(object):
         return COMM_SUCCESS
 
     def rxPacket(self, port):
-        rxpacket = []
+        """Returns the next status packet, reading from the port until one is complete or the packet times out."""
+        parser = self.parser
+        rxpacket = b""
 
         result = COMM_TX_FAIL
-        rx_length = 0
-        wait_length = 11  # minimum length (HEADER0 HEADER1 HEADER2 RESERVED ID LENGTH_L LENGTH_H INST ERROR CRC16_L CRC16_H)
 
-        GPIO.output(RTS_PIN, GPIO.LOW)
         while True:
-            rxpacket.extend(port.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 3)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF) and (rxpacket[idx + 2] == 0xFD) and (
-                            rxpacket[idx + 3] != 0xFD):
-                        break
-
-                if idx == 0:
-                    if (rxpacket[PKT_RESERVED] != 0x00) or (rxpacket[PKT_ID] > 0xFC) or (
-                            DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_INSTRUCTION] != 0x55):
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    if wait_length != (DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1):
-                        wait_length = DXL_MAKEWORD(rxpacket[PKT_LENGTH_L], rxpacket[PKT_LENGTH_H]) + PKT_LENGTH_H + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        if port.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
-
-                    crc = DXL_MAKEWORD(rxpacket[wait_length - 2], rxpacket[wait_length - 1])
-
-                    if self.updateCRC(0, rxpacket, wait_length - 2) == crc:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+            if parser.feed(port.readPort(parser.free())):
+                rxpacket, result = parser.packets.popleft()
+                break
 
+            if port.isPacketTimeout():
+                if parser.pending() == 0:
+                    result = COMM_RX_TIMEOUT
                 else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
+                    result = COMM_RX_CORRUPT
+                break
 
-            else:
-                if port.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+            self.waitPort(port)
 
         port.is_using = False
 
@@ -316,6 +442,24 @@ class Protocol2PacketHandler(object):
 
         return rxpacket, result
 
+    def waitPort(self, port):
+        """Sleeps until the port has bytes to read or its packet timeout is up.
+
+        Where the serial port cannot be select()ed (Windows) it returns right away and the
+        receive loops poll as before.
+        """
+        if not self.select_rx:
+            return
+
+        remaining = port.packet_timeout - port.getTimeSinceStart()
+        if remaining <= 0:
+            return
+
+        try:
+            select.select([port.ser], [], [], remaining / 1000)
+        except (OSError, ValueError, TypeError):
+            self.select_rx = False
+
     # NOT for BulkRead / SyncRead instruction
     def txRxPacket(self, port, txpacket):
         rxpacket = None
@@ -327,7 +471,7 @@ class Protocol2PacketHandler(object):
             return rxpacket, result, error
 
         # (Instruction == BulkRead or SyncRead) == this function is not available.
-        if txpacket[PKT_INSTRUCTION] == INST_BULK_READ or txpacket[PKT_INSTRUCTION] == INST_SYNC_READ:
+        if txpacket[PKT_INSTRUCTION] in (INST_BULK_READ, INST_SYNC_READ, INST_FAST_SYNC_READ):
             result = COMM_NOT_AVAILABLE
 
         # (ID == Broadcast ID) == no need to wait for status packet or not available.
@@ -358,19 +502,14 @@ class Protocol2PacketHandler(object):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 10
-
         if dxl_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 3
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_PING
+        txpacket = self.encodeInstruction(dxl_id, INST_PING, 0)
 
         rxpacket, result, error = self.txRxPacket(port, txpacket)
         if result == COMM_SUCCESS:
-            model_number = DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2])
+            model_number, = WORD_STRUCT.unpack_from(rxpacket, PKT_PARAMETER0 + 1)
 
         return model_number, result, error
 
@@ -379,18 +518,13 @@ class Protocol2PacketHandler(object):
 
         STATUS_LENGTH = 14
 
-        rx_length = 0
         wait_length = STATUS_LENGTH * MAX_ID
 
-        txpacket = [0] * 10
-        rxpacket = []
+        parser = self.parser
 
         tx_time_per_byte = (1000.0 / port.getBaudRate()) *10.0;
 
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = 3
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_PING
+        txpacket = self.encodeInstruction(BROADCAST_ID, INST_PING, 0)
 
         result = self.txPacket(port, txpacket)
         if result != COMM_SUCCESS:
@@ -401,123 +535,110 @@ class Protocol2PacketHandler(object):
         #port.setPacketTimeout(wait_length * 1)
         port.setPacketTimeoutMillis((wait_length * tx_time_per_byte) + (3.0 * MAX_ID) + 16.0);
 
+        # Replies are split into packets while they arrive.
         while True:
-            rxpacket += port.readPort(wait_length - rx_length)
-            rx_length = len(rxpacket)
+            parser.feed(port.readPort(parser.free()))
 
-            if port.isPacketTimeout():  # or rx_length >= wait_length
+            if port.isPacketTimeout():
                 break
 
+            self.waitPort(port)
+
         port.is_using = False
 
-        if rx_length == 0:
+        if not parser.packets and parser.pending() == 0:
             return data_list, COMM_RX_TIMEOUT
 
-        while True:
-            if rx_length < STATUS_LENGTH:
-                return data_list, COMM_RX_CORRUPT
+        result = COMM_RX_CORRUPT
+        while parser.packets:
+            rxpacket, packet_result = parser.packets.popleft()
 
-            # find packet header
-            for idx in range(0, rx_length - 2):
-                if rxpacket[idx] == 0xFF and rxpacket[idx + 1] == 0xFF and rxpacket[idx + 2] == 0xFD:
-                    break
+            if packet_result == COMM_SUCCESS and len(rxpacket) == STATUS_LENGTH:
+                result = COMM_SUCCESS
+                data_list[rxpacket[PKT_ID]] = [
+                    DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2]),
+                    rxpacket[PKT_PARAMETER0 + 3]]
 
-            if idx == 0:  # found at the beginning of the packet
-                # verify CRC16
-                crc = DXL_MAKEWORD(rxpacket[STATUS_LENGTH - 2], rxpacket[STATUS_LENGTH - 1])
+        return data_list, result
 
-                if self.updateCRC(0, rxpacket, STATUS_LENGTH - 2) == crc:
-                    result = COMM_SUCCESS
+    def scanPing(self, port, ids, expected=None):
+        """Pings 'ids' one by one with a deadline sized for a single reply.
 
-                    data_list[rxpacket[PKT_ID]] = [
-                        DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2]),
-                        rxpacket[PKT_PARAMETER0 + 3]]
+        A missing ID costs about 3 ms instead of a full txRxPacket timeout, and the scan stops as soon
+        as 'expected' motors have answered. Returns the same {id: [model_number, firmware]} as broadcastPing.
 
-                    del rxpacket[0: STATUS_LENGTH]
-                    rx_length = rx_length - STATUS_LENGTH
+        The pings are not sent in back-to-back batches: unlike Sync/Bulk Read, where each motor waits
+        for the previous reply, every pinged motor answers its own status return delay after its ping.
+        At 1 Mbaud a ping (10 bytes) is 100 us and a reply (14 bytes) 140 us, so the replies of pings
+        sent back to back overlap on the half-duplex bus (and at lower baud rates they collide with the
+        pings still being sent). Sparing the pings enough to avoid that leaves no time to gain.
+        """
+        data_list = {}
+        result = COMM_RX_TIMEOUT
 
-                    if rx_length == 0:
-                        return data_list, result
+        STATUS_LENGTH = 14
 
-                else:
-                    result = COMM_RX_CORRUPT
+        tx_time_per_byte = (1000.0 / port.getBaudRate()) * 10.0
 
-                    # remove header (0xFF 0xFF 0xFD)
-                    del rxpacket[0: 3]
-                    rx_length = rx_length - 3
+        for dxl_id in ids:
+            if dxl_id >= BROADCAST_ID:
+                continue
 
-            else:
-                # remove unnecessary packets
-                del rxpacket[0: idx]
-                rx_length = rx_length - idx
+            txpacket = self.encodeInstruction(dxl_id, INST_PING, 0)
+            if self.txPacket(port, txpacket) != COMM_SUCCESS:
+                port.is_using = False
+                continue
+
+            # 3 ms: status return delay, as in broadcastPing
+            port.setPacketTimeoutMillis((STATUS_LENGTH + len(txpacket)) * tx_time_per_byte + 3.0)
+
+            while True:
+                rxpacket, packet_result = self.rxPacket(port)
+                if packet_result != COMM_SUCCESS or rxpacket[PKT_ID] == dxl_id:
+                    break
+
+            if packet_result == COMM_SUCCESS and len(rxpacket) == STATUS_LENGTH:
+                result = COMM_SUCCESS
+                data_list[dxl_id] = [
+                    DXL_MAKEWORD(rxpacket[PKT_PARAMETER0 + 1], rxpacket[PKT_PARAMETER0 + 2]),
+                    rxpacket[PKT_PARAMETER0 + 3]]
+
+                if expected is not None and len(data_list) >= expected:
+                    break
 
-        # FIXME: unreachable code
         return data_list, result
 
     def action(self, port, dxl_id):
-        txpacket = [0] * 10
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 3
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_ACTION
+        txpacket = self.encodeInstruction(dxl_id, INST_ACTION, 0)
 
         _, result, _ = self.txRxPacket(port, txpacket)
         return result
 
     def reboot(self, port, dxl_id):
-        txpacket = [0] * 10
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 3
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_REBOOT
+        txpacket = self.encodeInstruction(dxl_id, INST_REBOOT, 0)
 
         _, result, error = self.txRxPacket(port, txpacket)
         return result, error
 
     def clearMultiTurn(self, port, dxl_id):
-        txpacket = [0] * 15
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 8
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_CLEAR
-        txpacket[PKT_PARAMETER0 + 0] = 0x01
-        txpacket[PKT_PARAMETER0 + 1] = 0x44
-        txpacket[PKT_PARAMETER0 + 2] = 0x58
-        txpacket[PKT_PARAMETER0 + 3] = 0x4C
-        txpacket[PKT_PARAMETER0 + 4] = 0x22
+        txpacket = self.encodeInstruction(dxl_id, INST_CLEAR, 5)
+        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + 5] = b"\x01\x44\x58\x4C\x22"
 
         _, result, error = self.txRxPacket(port, txpacket)
         return result, error
 
     def factoryReset(self, port, dxl_id, option):
-        txpacket = [0] * 11
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 4
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_FACTORY_RESET
+        txpacket = self.encodeInstruction(dxl_id, INST_FACTORY_RESET, 1)
         txpacket[PKT_PARAMETER0] = option
 
         _, result, error = self.txRxPacket(port, txpacket)
         return result, error
 
     def readTx(self, port, dxl_id, address, length):
-        txpacket = [0] * 14
-
         if dxl_id >= BROADCAST_ID:
             return COMM_NOT_AVAILABLE
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 7
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-        txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(length)
-        txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(length)
+        txpacket = self.encodeRead(INST_READ, dxl_id, address, length)
 
         result = self.txPacket(port, txpacket)
 
@@ -532,7 +653,7 @@ class Protocol2PacketHandler(object):
         error = 0
 
         rxpacket = None
-        data = []
+        data = b""
 
         while True:
             rxpacket, result = self.rxPacket(port)
@@ -543,33 +664,27 @@ class Protocol2PacketHandler(object):
         if result == COMM_SUCCESS and rxpacket[PKT_ID] == dxl_id:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length])
+            # Copied out: GroupSyncRead/GroupBulkRead keep this data after the next packet arrives.
+            data = bytes(rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length])
 
         return data, result, error
 
     def readTxRx(self, port, dxl_id, address, length):
         error = 0
 
-        txpacket = [0] * 14
-        data = []
+        data = b""
 
         if dxl_id >= BROADCAST_ID:
             return data, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = 7
-        txpacket[PKT_LENGTH_H] = 0
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-        txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(length)
-        txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(length)
+        txpacket = self.encodeRead(INST_READ, dxl_id, address, length)
 
         rxpacket, result, error = self.txRxPacket(port, txpacket)
         if result == COMM_SUCCESS:
             error = rxpacket[PKT_ERROR]
 
-            data.extend(rxpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length])
+            # View over the status packet, no copy.
+            data = memoryview(rxpacket)[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length]
 
         return data, result, error
 
@@ -591,12 +706,12 @@ class Protocol2PacketHandler(object):
 
     def read2ByteRx(self, port, dxl_id):
         data, result, error = self.readRx(port, dxl_id, 2)
-        data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
+        data_read = WORD_STRUCT.unpack_from(data)[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read2ByteTxRx(self, port, dxl_id, address):
         data, result, error = self.readTxRx(port, dxl_id, address, 2)
-        data_read = DXL_MAKEWORD(data[0], data[1]) if (result == COMM_SUCCESS) else 0
+        data_read = WORD_STRUCT.unpack_from(data)[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read4ByteTx(self, port, dxl_id, address):
@@ -604,27 +719,16 @@ class Protocol2PacketHandler(object):
 
     def read4ByteRx(self, port, dxl_id):
         data, result, error = self.readRx(port, dxl_id, 4)
-        data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
-                                  DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
+        data_read = DWORD_STRUCT.unpack_from(data)[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def read4ByteTxRx(self, port, dxl_id, address):
         data, result, error = self.readTxRx(port, dxl_id, address, 4)
-        data_read = DXL_MAKEDWORD(DXL_MAKEWORD(data[0], data[1]),
-                                  DXL_MAKEWORD(data[2], data[3])) if (result == COMM_SUCCESS) else 0
+        data_read = DWORD_STRUCT.unpack_from(data)[0] if (result == COMM_SUCCESS) else 0
         return data_read, result, error
 
     def writeTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(length + 5)
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, length, data)
 
         result = self.txPacket(port, txpacket)
         port.is_using = False
@@ -632,61 +736,62 @@ class Protocol2PacketHandler(object):
         return result
 
     def writeTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(length + 5)
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, length, data)
 
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
         rxpacket, result, error = self.txRxPacket(port, txpacket)
 
         return result, error
 
     def write1ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [data]
-        return self.writeTxOnly(port, dxl_id, address, 1, data_write)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 1)
+        txpacket[PKT_PARAMETER0 + 2] = data
+
+        result = self.txPacket(port, txpacket)
+        port.is_using = False
+
+        return result
 
     def write1ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [data]
-        return self.writeTxRx(port, dxl_id, address, 1, data_write)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 1)
+        txpacket[PKT_PARAMETER0 + 2] = data
+
+        _, result, error = self.txRxPacket(port, txpacket)
+        return result, error
 
     def write2ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
-        return self.writeTxOnly(port, dxl_id, address, 2, data_write)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 2)
+        WORD_STRUCT.pack_into(txpacket, PKT_PARAMETER0 + 2, data & 0xFFFF)
+
+        result = self.txPacket(port, txpacket)
+        port.is_using = False
+
+        return result
 
     def write2ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(data), DXL_HIBYTE(data)]
-        return self.writeTxRx(port, dxl_id, address, 2, data_write)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 2)
+        WORD_STRUCT.pack_into(txpacket, PKT_PARAMETER0 + 2, data & 0xFFFF)
+
+        _, result, error = self.txRxPacket(port, txpacket)
+        return result, error
 
     def write4ByteTxOnly(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
-        return self.writeTxOnly(port, dxl_id, address, 4, data_write)
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 4)
+        DWORD_STRUCT.pack_into(txpacket, PKT_PARAMETER0 + 2, data & 0xFFFFFFFF)
 
-    def write4ByteTxRx(self, port, dxl_id, address, data):
-        data_write = [DXL_LOBYTE(DXL_LOWORD(data)),
-                      DXL_HIBYTE(DXL_LOWORD(data)),
-                      DXL_LOBYTE(DXL_HIWORD(data)),
-                      DXL_HIBYTE(DXL_HIWORD(data))]
-        return self.writeTxRx(port, dxl_id, address, 4, data_write)
+        result = self.txPacket(port, txpacket)
+        port.is_using = False
 
-    def regWriteTxOnly(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
+        return result
 
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(length + 5)
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
+    def write4ByteTxRx(self, port, dxl_id, address, data):
+        txpacket = self.encodeWrite(INST_WRITE, dxl_id, address, 4)
+        DWORD_STRUCT.pack_into(txpacket, PKT_PARAMETER0 + 2, data & 0xFFFFFFFF)
 
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
+        _, result, error = self.txRxPacket(port, txpacket)
+        return result, error
+
+    def regWriteTxOnly(self, port, dxl_id, address, length, data):
+        txpacket = self.encodeWrite(INST_REG_WRITE, dxl_id, address, length, data)
 
         result = self.txPacket(port, txpacket)
         port.is_using = False
@@ -694,74 +799,76 @@ class Protocol2PacketHandler(object):
         return result
 
     def regWriteTxRx(self, port, dxl_id, address, length, data):
-        txpacket = [0] * (length + 12)
-
-        txpacket[PKT_ID] = dxl_id
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(length + 5)
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(length + 5)
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(address)
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + length] = data[0: length]
+        txpacket = self.encodeWrite(INST_REG_WRITE, dxl_id, address, length, data)
 
         _, result, error = self.txRxPacket(port, txpacket)
 
         return result, error
 
-    def syncReadTx(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
+    def syncReadTx(self, port, start_address, data_length, param, param_length, fast_option=False):
+        instruction = INST_FAST_SYNC_READ if fast_option else INST_SYNC_READ
+        txpacket = self.encodeSync(instruction, start_address, data_length, param, param_length)
         # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_READ
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(start_address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(start_address)
-        txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(data_length)
-        txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(data_length)
-
-        txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = param[0: param_length]
-
         result = self.txPacket(port, txpacket)
         if result == COMM_SUCCESS:
-            port.setPacketTimeout((11 + data_length) * param_length)
+            if fast_option:
+                # One status packet: HEADER(8) ERROR + per motor (ID DATA CRC16_L CRC16_H)
+                port.setPacketTimeout(11 + (data_length + 4) * param_length)
+            else:
+                port.setPacketTimeout((11 + data_length) * param_length)
 
         return result
-   
-    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 14)
-        # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(
-            param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(
-            param_length + 7)  # 7: INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = DXL_LOBYTE(start_address)
-        txpacket[PKT_PARAMETER0 + 1] = DXL_HIBYTE(start_address)
-        txpacket[PKT_PARAMETER0 + 2] = DXL_LOBYTE(data_length)
-        txpacket[PKT_PARAMETER0 + 3] = DXL_HIBYTE(data_length)
+    def fastSyncReadRx(self, port, param, data_length):
+        """Receives the single status packet answering a Fast Sync Read.
+
+        The motors in 'param' answer in order, each appending [ERROR ID DATA CRC16] to the packet,
+        the last CRC being the packet one:
+          HEADER0 HEADER1 HEADER2 RESERVED 0xFE LEN_L LEN_H 0x55 [ERR ID DATA.. CRC16_L CRC16_H].. CRC16_L CRC16_H
+
+        Returns:
+          data:   DATA per motor ID (empty if the packet is missing or malformed).
+          result: COMM_* result.
+          error:  first non-zero motor error.
+        """
+        data = {}
+        error = 0
 
-        txpacket[PKT_PARAMETER0 + 4: PKT_PARAMETER0 + 4 + param_length] = param[0: param_length]
+        while True:
+            rxpacket, result = self.rxPacket(port)
+            if result != COMM_SUCCESS or rxpacket[PKT_ID] == BROADCAST_ID:
+                break
+
+        if result != COMM_SUCCESS:
+            return data, result, error
+
+        stride = data_length + 4
+        if len(rxpacket) != PKT_PARAMETER0 + stride * len(param):
+            return data, COMM_RX_CORRUPT, error
+
+        for index, dxl_id in enumerate(param):
+            block = PKT_PARAMETER0 + stride * index
+            if rxpacket[block + 1] != dxl_id:
+                return {}, COMM_RX_CORRUPT, error
+
+            error = error or rxpacket[block]
+            data[dxl_id] = rxpacket[block + 2: block + 2 + data_length]
+
+        return data, result, error
+
+    def syncWriteTxOnly(self, port, start_address, data_length, param, param_length):
+        txpacket = self.encodeSync(INST_SYNC_WRITE, start_address, data_length, param, param_length)
+        # 14: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST START_ADDR_L START_ADDR_H DATA_LEN_L DATA_LEN_H CRC16_L CRC16_H
 
         _, result, _ = self.txRxPacket(port, txpacket)
 
         return result
 
     def bulkReadTx(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = self.encodeBulk(INST_BULK_READ, param, param_length)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
-        txpacket[PKT_INSTRUCTION] = INST_BULK_READ
-
-        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + param_length] = param[0: param_length]
-
         result = self.txPacket(port, txpacket)
         if result == COMM_SUCCESS:
             wait_length = 0
@@ -774,16 +881,9 @@ class Protocol2PacketHandler(object):
         return result
 
     def bulkWriteTxOnly(self, port, param, param_length):
-        txpacket = [0] * (param_length + 10)
+        txpacket = self.encodeBulk(INST_BULK_WRITE, param, param_length)
         # 10: HEADER0 HEADER1 HEADER2 RESERVED ID LEN_L LEN_H INST CRC16_L CRC16_H
 
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH_L] = DXL_LOBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
-        txpacket[PKT_LENGTH_H] = DXL_HIBYTE(param_length + 3)  # 3: INST CRC16_L CRC16_H
-        txpacket[PKT_INSTRUCTION] = INST_BULK_WRITE
-
-        txpacket[PKT_PARAMETER0: PKT_PARAMETER0 + param_length] = param[0: param_length]
-
         _, result, _ = self.txRxPacket(port, txpacket)
 
         return result
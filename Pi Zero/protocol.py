@@ -0,0 +1,134 @@
+"""Messages shared by the Pi Zero server and the clients (client.py adds this folder to its path)."""
+
+import re, time
+from struct import Struct, pack
+
+from numpy import dtype, zeros, frombuffer
+
+
+# Commands and their replies go over REQ (or DEALER) / ROUTER on COMMAND_PORT, preview frames are published on VIDEO_PORT
+# and grasp progress events (JSON) on EVENT_PORT.
+COMMAND_PORT    = 5555
+VIDEO_PORT      = 5556
+EVENT_PORT      = 5557
+VIDEO_HWM       = 4         # Frames queued per subscriber before the publisher drops them.
+HEARTBEAT       = 0.5       # Seconds without a new frame after which an unchanged frame marker is published.
+
+# Pipelined (DEALER) clients send [request id, b"", command, stats?] and get [request id, b"", reply...] back.
+REQUEST_ID      = Struct("<I")
+
+# Commands answered by the server itself instead of being run on the controller.
+SNAPSHOT        = "snapshot"    # Reply with a full resolution frame instead of the preview.
+GOVERNOR        = "governor"    # Reply with the quality governor settings.
+TELEMETRY       = "telemetry"   # Reply with freshly read telemetry.
+GRASP           = "grasp"       # "grasp <name>" starts a grasp macro on the Pi, "grasp stop" stops it.
+LOOP            = "loop"        # Reply with the control loop timing statistics.
+CLIENTS         = "clients"     # Reply with the bus and camera time used by each client.
+BUS             = "bus"         # Reply with the bus arbiter statistics (per priority class).
+
+# Published in place of a JPEG when the scene has not changed: the client reuses frame 'seq'.
+UNCHANGED       = b"SAME"
+UNCHANGED_FRAME = Struct("<4sQ")    # UNCHANGED, seq
+FRAME_TIMES     = re.compile(r"age: ([\d.]+) sent: ([\d.]+)")
+
+
+def unchanged_frame(seq:int) -> bytes:
+    return UNCHANGED_FRAME.pack(UNCHANGED, seq)
+
+
+def frame_msg(seq:int, timestamp:float) -> str:
+    "Text sent with preview frame 'seq' (encoded at 'timestamp'): its age and the time it is sent, from the Pi's clock."
+    now = time.time()
+    return f"frame {seq} (age: {now - timestamp:.3f} sent: {now:.3f})"
+
+
+def parse_frame_msg(msg:str) -> tuple:
+    "Returns (age, sent) of a frame_msg(), None for any other message."
+    match = FRAME_TIMES.search(msg)
+    return None if match is None else (float(match[1]), float(match[2]))
+
+
+def parse_unchanged(payload) -> int:
+    "Returns the seq of an unchanged frame marker, None if 'payload' is a JPEG."
+    if len(payload) != UNCHANGED_FRAME.size or bytes(payload[:4]) != UNCHANGED:
+        return None
+    return UNCHANGED_FRAME.unpack(payload)[1]
+
+
+# Binary commands: COMMAND header (opcode, motor mask, number of values) followed by the values.
+# Mask bit i selects motor i, 0 means every motor (ids=None). Opcodes are below 0x20, so a command
+# whose first byte is a printable character is the text form, "method(args)".
+COMMAND = Struct("<BHB")
+
+# opcode: (Controller method, arguments, value format). Arguments are "" (ids only), "one" value or
+# "many" values, one per motor (or a single one for all of them).
+COMMANDS = {
+    0x01: ("set_torque",                "one",  "b"),
+    0x02: ("set_mode",                  "one",  "b"),
+    0x03: ("set_motor_position",        "one",  "f"),
+    0x04: ("set_motor_velocity",        "one",  "f"),
+    0x05: ("set_motor_pwm",             "one",  "f"),
+    0x06: ("set_led",                   "one",  "b"),
+    0x11: ("set_sync_torque",           "many", "b"),
+    0x12: ("set_sync_mode",             "many", "b"),
+    0x13: ("set_sync_motor_position",   "many", "f"),
+    0x14: ("set_sync_motor_velocity",   "many", "f"),
+    0x15: ("set_sync_motor_pwm",        "many", "f"),
+    0x16: ("switch_mode",               "many", "b"),   # Torque off, mode, torque on as Bulk Writes.
+    0x18: ("get_torque",                "",     "b"),
+    0x19: ("get_mode",                  "",     "b"),
+    0x1A: ("get_motor_position",        "",     "b"),
+    0x1B: ("get_load",                  "",     "b"),
+    0x1C: ("get_voltage",               "",     "b"),
+}
+OPCODES = {name: opcode for opcode, (name, _, _) in COMMANDS.items()}
+
+
+def is_binary(command) -> bool:
+    return isinstance(command, (bytes, bytearray, memoryview)) and len(command) > 0 and command[0] < 0x20
+
+
+def encode_command(name:str, values=(), ids:list[int]=None) -> bytes:
+    """Encodes a call to Controller.'name' as a binary command.
+
+    Arguments:
+      values: the goal (or per motor goals), nothing for a getter.
+      ids:    motor IDs (0-15), None for every motor. Per motor goals are sent in ID order, so they
+              may be given in any order.
+    """
+    opcode = OPCODES[name]
+    _, arguments, fmt = COMMANDS[opcode]
+
+    values = list(values) if isinstance(values, (list, tuple)) else [values]
+    if arguments == "many" and ids is not None and len(values) == len(ids):
+        ids, values = zip(*sorted(zip(ids, values))) if ids else ((), ())
+
+    mask = 0
+    for id in ids or ():
+        mask |= 1 << id
+
+    return COMMAND.pack(opcode, mask, len(values)) + pack(f"<{len(values)}{fmt}", *values)
+
+
+# Command replies are [text, telemetry]: TELEMETRY_MAGIC followed by one packed TELEMETRY_DTYPE record
+# per motor, as read by Controller.get_state() at 'timestamp' (Pi clock). Its load is signed (negative
+# when opening), as get_signed_load() returns it; mode is -1 for a mode other than Position/Velocity/PWM.
+TELEMETRY_MAGIC = b"TLM1"
+TELEMETRY_DTYPE = dtype([("id", "u1"), ("mode", "i1"), ("torque", "u1"), ("position", "<f4"), ("load", "<f4"),
+                         ("voltage", "<f4"), ("timestamp", "<f8")])
+
+
+def pack_telemetry(state) -> bytes:
+    "Packs a Controller.get_state() record array; fields it does not have are sent as 0."
+    telemetry = zeros(len(state), TELEMETRY_DTYPE)
+    for name in TELEMETRY_DTYPE.names:
+        if name in state.dtype.names:
+            telemetry[name] = state[name]
+    return TELEMETRY_MAGIC + telemetry.tobytes()
+
+
+def parse_telemetry(payload):
+    "Returns the telemetry in 'payload' as a (read-only) structured array, None if it is not telemetry."
+    if bytes(payload[:4]) != TELEMETRY_MAGIC or (len(payload) - 4) % TELEMETRY_DTYPE.itemsize:
+        return None
+    return frombuffer(payload, TELEMETRY_DTYPE, offset=4)
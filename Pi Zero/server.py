@@ -1,20 +1,80 @@
-import time, sys
+import time, sys, json, threading
 from imagezmq import SerializingContext
 from camera import Zero_Camera
-from zmq import REP
+from zmq import ROUTER, PUB, SNDHWM, SNDMORE, LINGER
+from protocol import COMMAND_PORT, VIDEO_PORT, EVENT_PORT, VIDEO_HWM, is_binary
 
 
 class Server():
+    """Command channel (ROUTER), video stream (PUB) and event stream (PUB) of the Pi Zero.
 
-    def __init__(self):
+    Commands are answered as soon as they are run, preview frames are published as soon as they are
+    encoded: neither waits for the other. Each socket must be used from a single thread, except the
+    event socket, which publish_event() locks.
+
+    The command socket serves both REQ clients (one request at a time) and DEALER clients, which
+    put a request id before the empty delimiter frame and keep several requests in flight. Either
+    way the reply goes back with the envelope of the request, so commands are answered in order,
+    one at a time, each to whoever sent it.
+    """
+
+    def __init__(self, command_port=COMMAND_PORT, video_port=VIDEO_PORT, event_port=EVENT_PORT):
         context = SerializingContext()
-        self.socket = context.socket(socket_type=REP)  # REP (REPLY) socket for sending replies to clients
-        self.socket.bind("tcp://*:5555")
+        self.socket = self.command_socket(context, command_port)  # ROUTER socket for sending replies to clients
+        self.envelope = None    # Routing frames of the request being answered.
+
+        self.video = context.socket(socket_type=PUB)   # PUB socket for the preview frames
+        self.video.setsockopt(SNDHWM, VIDEO_HWM)       # A slow client loses frames instead of queueing them
+        self.video.setsockopt(LINGER, 0)
+        self.video.bind(f"tcp://*:{video_port}")
+
+        self.events = context.socket(socket_type=PUB)  # PUB socket for progress events (grasps)
+        self.events.setsockopt(LINGER, 0)
+        self.events.bind(f"tcp://*:{event_port}")
+        self.events_lock = threading.Lock()            # Events come from several threads (grasps, control loop)
 
         print("[#] Server Ready!")
 
+    def command_socket(self, context, port:int):
+        "Returns the ROUTER socket the commands are received on and answered through."
+        socket = context.socket(socket_type=ROUTER)
+        socket.bind(f"tcp://*:{port}")
+        return socket
+
     def receive_msg(self):
-        return self.socket.recv().decode()
+        return self.receive_request()[0]
+
+    def receive_request(self) -> tuple[str, dict]:
+        """Receives a command and, if the client sent them, its stats for the previous reply.
+
+        Returns:
+          command: text command, or bytes of a binary command (see protocol.COMMANDS).
+          stats:   {"age": s, "decode": s} of the last preview frame the client decoded, or None.
+        """
+        request = self.parse_request(self.socket.recv_multipart())
+        while request is None:
+            print("[!]: Request without an envelope delimiter dropped")
+            request = self.parse_request(self.socket.recv_multipart())
+
+        self.envelope, command, stats = request
+        return command, stats
+
+    @staticmethod
+    def parse_request(frames:list[bytes]) -> tuple:
+        "Splits the frames of a request into (envelope, command, stats), None if it has no delimiter."
+        if b"" not in frames[1:]:
+            return None
+
+        delimiter = frames.index(b"", 1)
+        envelope, frames = frames[:delimiter + 1], frames[delimiter + 1:]
+        command = "" if not frames else frames[0] if is_binary(frames[0]) else frames[0].decode()
+
+        try:
+            stats = json.loads(frames[1]) if len(frames) > 1 else None
+        except ValueError:
+            stats = None
+
+        return envelope, command, stats
 
     def send_jpg(self, msg, img_data):
         """Send a jpg buffer with a text message.
@@ -26,25 +86,53 @@ class Server():
           msg: image name or text message.
           jpg_buffer: jpg buffer of compressed image to be sent.
         """
+        self.socket.send_multipart(self.envelope, SNDMORE)
         self.socket.send_jpg(msg, img_data, copy=False)       
 
+    def send_reply(self, msg:str, telemetry:bytes=None):
+        "Answers the last command with a text message and, if given, a telemetry frame (see protocol.pack_telemetry)."
+        frames = self.envelope + [msg.encode()]
+        if telemetry:
+            frames.append(telemetry)
+        self.socket.send_multipart(frames)
+
+    def publish_jpg(self, msg, img_data):
+        """Publishes a preview frame (or an unchanged frame marker) to every connected client.
+
+        Arguments:
+          msg: frame description.
+          img_data: jpg buffer of the frame.
+        """
+        if isinstance(img_data, memoryview):
+            # A zero-copy send goes out from the zmq I/O thread after returning, by which time the
+            # camera process may have overwritten the Frame_Ring slot the view points into.
+            img_data = bytes(img_data)
+        self.video.send_jpg(msg, img_data, copy=False)
+
+    def publish_event(self, event:dict):
+        "Publishes a progress event to every connected client (from any thread)."
+        with self.events_lock:
+            self.events.send_json(event)
+
     def __del__(self):
         self.socket.close()
+        self.video.close()
+        self.events.close()
 
 
 if __name__ == "__main__":
     ser = Server()
     cam = Zero_Camera()
+    cam.start_capture()
 
     try:
+        seq = 0
         while True:
-            msg = ser.receive_msg()
-
             start = time.time()
-            img_data = cam.get_buffer_data()
-            comp_time = time.time() - start 
+            seq, _, img_data = cam.wait_frame(seq)
+            wait_time = time.time() - start
 
-            ser.send_jpg(f"desired pos 30 deg (comp_t: {comp_time:.3f})", img_data)
+            ser.publish_jpg(f"frame {seq} (wait_t: {wait_time:.3f})", img_data)
 
     except (KeyboardInterrupt, SystemExit):
         print('Exit due to keyboard interrupt')
@@ -0,0 +1,236 @@
+import os, time, threading, heapq
+from struct import Struct
+
+from dynamixel_sdk import PortHandler
+from dynamixel_sdk.robotis_def import *
+from packet_handler_modified_p_2 import INST_FAST_SYNC_READ
+
+
+CRC_TABLE_POLY = 0x8005
+
+def _crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC_TABLE_POLY) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+CRC_TABLE = _crc_table()
+
+WORD = Struct("<H")
+ADDR_LEN = Struct("<HH")
+
+
+def crc16(data):
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) ^ CRC_TABLE[((crc >> 8) ^ byte) & 0xFF]) & 0xFFFF
+    return crc
+
+
+def make_packet(dxl_id, instruction, params=b""):
+    body = bytes(params).replace(b"\xFF\xFF\xFD", b"\xFF\xFF\xFD\xFD")
+    packet = bytearray(b"\xFF\xFF\xFD\x00") + bytes([dxl_id]) + WORD.pack(len(body) + 3) + bytes([instruction]) + body
+    return bytes(packet + WORD.pack(crc16(packet)))
+
+
+class Simulated_Motor():
+    "MX-28 (Protocol 2.0) control table with the registers this project touches."
+
+    MODEL_NUMBER            = 30
+    FIRMWARE                = 46
+    ADDR_INDIRECT_ADDRESS   = 168
+    ADDR_INDIRECT_DATA      = 224
+    N_INDIRECT              = 28
+
+    def __init__(self, dxl_id):
+        self.id = dxl_id
+        self.table = bytearray(1024)
+        WORD.pack_into(self.table, 0, self.MODEL_NUMBER)
+        self.table[6] = self.FIRMWARE
+        self.table[7] = dxl_id
+        self.table[11] = 4                          # Extended position mode
+        WORD.pack_into(self.table, 144, 120)        # 12.0 V
+        self.table[146] = 35                        # 35 ºC
+        for i in range(self.N_INDIRECT):
+            WORD.pack_into(self.table, self.ADDR_INDIRECT_ADDRESS + 2*i, self.ADDR_INDIRECT_DATA + i)
+
+    def resolve(self, address):
+        if self.ADDR_INDIRECT_DATA <= address < self.ADDR_INDIRECT_DATA + self.N_INDIRECT:
+            return WORD.unpack_from(self.table, self.ADDR_INDIRECT_ADDRESS + 2*(address - self.ADDR_INDIRECT_DATA))[0]
+        return address
+
+    def read(self, address, length):
+        return bytes(self.table[self.resolve(a)] for a in range(address, address + length))
+
+    def write(self, address, data):
+        for i, byte in enumerate(data):
+            self.table[self.resolve(address + i)] = byte
+
+        # Goals are reached instantly.
+        self.table[132:136] = self.table[116:120]
+        self.table[128:132] = self.table[104:108]
+
+
+class Simulated_Serial():
+    """pyserial stand-in: instruction packets are answered by the simulated motors.
+
+    Replies are written into a pipe by a feeder thread at the time they would finish
+    arriving on a real half-duplex bus, so the port has a real file descriptor to wait on.
+    """
+
+    def __init__(self, motors, baudrate, return_delay=500e-6, fast_sync_read=True):
+        self.motors = motors
+        self.byte_time = 10 / baudrate
+        self.return_delay = return_delay
+        self.fast_sync_read = fast_sync_read
+        self.packets = 0        # Instruction packets written.
+        self.replies = 0        # Status packets sent back.
+
+        self.rx, self.tx = os.pipe()
+        os.set_blocking(self.rx, False)
+
+        self.queue = []
+        self.cond = threading.Condition()
+        self.is_open = True
+        threading.Thread(target=self.feeder, daemon=True).start()
+
+    def fileno(self):
+        return self.rx
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def feeder(self):
+        with self.cond:
+            while self.is_open:
+                if not self.queue:
+                    self.cond.wait()
+                    continue
+                ready, _, data = self.queue[0]
+                delay = ready - time.perf_counter()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+                heapq.heappop(self.queue)
+                os.write(self.tx, data)
+
+    def reply_at(self, at, data):
+        with self.cond:
+            heapq.heappush(self.queue, (at, id(data), data))
+            self.cond.notify()
+
+    def read(self, length):
+        try:
+            return os.read(self.rx, length)
+        except BlockingIOError:
+            return b""
+
+    def reset_input_buffer(self):
+        while self.read(4096):
+            pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self.cond:
+            self.is_open = False
+            self.cond.notify()
+        os.close(self.rx)
+        os.close(self.tx)
+
+    def write(self, packet):
+        packet = bytes(packet)
+        self.packets += 1
+        now = time.perf_counter() + len(packet) * self.byte_time
+        self.handle(packet, now)
+        return len(packet)
+
+    def handle(self, packet, t):
+        if packet[:4] != b"\xFF\xFF\xFD\x00" or crc16(packet[:-2]) != WORD.unpack_from(packet, len(packet) - 2)[0]:
+            return
+
+        dxl_id, instruction = packet[4], packet[7]
+        params = packet[8:-2].replace(b"\xFF\xFF\xFD\xFD", b"\xFF\xFF\xFD")
+
+        def status(motor, data=b"", error=0):
+            return make_packet(motor.id, INST_STATUS, bytes([error]) + data)
+
+        def send(replies):
+            nonlocal t
+            for reply in replies:
+                self.replies += 1
+                t += self.return_delay + len(reply) * self.byte_time
+                self.reply_at(t, reply)
+
+        if instruction == INST_PING:
+            targets = self.motors.values() if dxl_id == BROADCAST_ID else [self.motors[dxl_id]] if dxl_id in self.motors else []
+            send(status(m, WORD.pack(m.MODEL_NUMBER) + bytes([m.FIRMWARE])) for m in targets)
+
+        elif instruction == INST_READ and dxl_id in self.motors:
+            address, length = ADDR_LEN.unpack_from(params)
+            send([status(self.motors[dxl_id], self.motors[dxl_id].read(address, length))])
+
+        elif instruction == INST_WRITE:
+            address, = WORD.unpack_from(params)
+            targets = self.motors.values() if dxl_id == BROADCAST_ID else [self.motors[dxl_id]] if dxl_id in self.motors else []
+            for m in targets:
+                m.write(address, params[2:])
+            if dxl_id != BROADCAST_ID:
+                send(status(m) for m in targets)
+
+        elif instruction == INST_SYNC_READ:
+            address, length = ADDR_LEN.unpack_from(params)
+            send(status(self.motors[i], self.motors[i].read(address, length)) for i in params[4:] if i in self.motors)
+
+        elif instruction == INST_FAST_SYNC_READ:
+            address, length = ADDR_LEN.unpack_from(params)
+            ids = [i for i in params[4:] if i in self.motors]
+            if not self.fast_sync_read or not ids:
+                return
+            data = bytearray()
+            for n, i in enumerate(ids):
+                block = bytes([0, i]) + self.motors[i].read(address, length)
+                data += block[1:] if n == 0 else block
+                if n < len(ids) - 1:
+                    data += WORD.pack(crc16(block))
+            send([make_packet(BROADCAST_ID, INST_STATUS, bytes([0]) + data)])
+
+        elif instruction == INST_SYNC_WRITE:
+            address, length = ADDR_LEN.unpack_from(params)
+            for i in range(4, len(params), length + 1):
+                if params[i] in self.motors:
+                    self.motors[params[i]].write(address, params[i + 1: i + 1 + length])
+
+        elif instruction == INST_BULK_WRITE:
+            i = 0
+            while i < len(params):
+                dxl, (address, length) = params[i], ADDR_LEN.unpack_from(params, i + 1)
+                if dxl in self.motors:
+                    self.motors[dxl].write(address, params[i + 5: i + 5 + length])
+                i += 5 + length
+
+
+class Simulated_Port(PortHandler):
+    "PortHandler talking to simulated MX-28 motors instead of a serial device."
+
+    def __init__(self, n_motors=5, ids=None, return_delay=500e-6, fast_sync_read=True):
+        super().__init__("sim")
+        ids = range(n_motors) if ids is None else ids
+        self.motors = {dxl_id: Simulated_Motor(dxl_id) for dxl_id in ids}
+        self.return_delay = return_delay
+        self.fast_sync_read = fast_sync_read
+
+    def setupPort(self, cflag_baud):
+        if self.is_open:
+            self.closePort()
+
+        self.ser = Simulated_Serial(self.motors, self.baudrate, self.return_delay, self.fast_sync_read)
+        self.is_open = True
+        self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
+
+        return True
@@ -1,45 +1,72 @@
-import time
+import time, asyncio, threading
 
-from camera import Zero_Camera
+from camera import Zero_Camera, Zero_Camera_Process
 from controller import Controller as Controller
-from server import Server
+from async_server import Async_Server
+from governor import Quality_Governor
+from dispatcher import Dispatcher
+from grasp import Grasp_Engine
+from control_loop import Control_Loop
+from bus_arbiter import Bus_Arbiter
+from protocol import HEARTBEAT, unchanged_frame, frame_msg
 
 
+CAMERA_PROCESS = False  # Capture and encode in a separate process (multi-core Pi Zero 2 W) instead of a thread.
+TARGET_LATENCY = 0.1            # Frame latency (age when received + decode) the quality governor holds, in seconds.
+CONTROL_LOOP   = True           # Motor I/O on a fixed rate thread, commands only set goals and read its last state.
+CONTROL_RATE   = 100            # Control loop ticks per second.
+CONTROL_RT     = False          # Opt-in: SCHED_FIFO for the control loop (needs root, warns otherwise).
+CONTROL_MLOCK  = False          # Opt-in, with CONTROL_RT: mlockall the whole process, camera and zmq buffers included (512 MB Pi Zero!).
+CONTROL_CPU    = None           # CPU the control loop is pinned to (e.g. 3 on a Pi Zero 2 W), None to let it move.
 
-def do_command(ctl:Controller, command:str):
-    
-    try:
-        if not command or command.casefold() == "none":
-            output = "[#]: None"
+
+def stream_video(ser:Async_Server, cam, stop:threading.Event):
+    """Publishes every new preview frame as soon as the camera has encoded it, until 'stop' is set.
+
+    While the scene is static no frame is encoded, so an unchanged frame marker is published every
+    HEARTBEAT seconds instead.
+    """
+    seq = 0
+    while not stop.is_set():
+        new_seq, timestamp, img_data = cam.wait_frame(seq, timeout=HEARTBEAT)
+        if img_data is None:
+            continue
+
+        if new_seq > seq:
+            ser.publish_jpg(frame_msg(new_seq, timestamp), img_data)
         else:
-            output = eval(f"ctl.{command}")
-    except Exception as e:
-        output = f"[!]: Wrong Command! '{command}' -> {e}"
-    
-    return output 
-        
+            ser.publish_jpg(f"frame {seq} (unchanged)", unchanged_frame(seq))
+        seq = new_seq
 
 
 if __name__ == "__main__":
+    stop = threading.Event()
+    cam = grasps = loop = None     # Whatever started before a failure is stopped in the finally clause.
     try:
-        ser = Server()
-        cam = Zero_Camera()
+        ser = Async_Server()
+        if CAMERA_PROCESS:
+            cam = Zero_Camera_Process()
+        else:
+            cam = Zero_Camera()
+            cam.start_capture()
         ctl = Controller(5, info=False)
-        print("[#]: Server ready! Waiting for client...")
-
-        while True:
-            start = time.time()
-            img_data = cam.get_buffer_data()
-            cam_t = time.time() - start
-            
-            command = ser.receive_msg()
-            
-            start = time.time()
-            result = do_command(ctl, command)
-            eval_t = time.time()-start
-
-            msg = f"{result} (cam_t: {cam_t:.3f} eval_t: {eval_t:.3f})"
-            ser.send_jpg(msg, img_data)
+
+        # The control loop, grasp macros, commands and telemetry share the bus through the arbiter.
+        bus = Bus_Arbiter(ctl)
+        if CONTROL_LOOP:
+            loop = Control_Loop(ctl, bus, CONTROL_RATE, realtime=CONTROL_RT, cpu=CONTROL_CPU,
+                                lock_memory=CONTROL_MLOCK, publish=ser.publish_event)
+        dispatcher = Dispatcher(ctl, loop, bus)
+        grasps = Grasp_Engine(ctl, bus, publish=ser.publish_event, loop=loop)
+        governor = Quality_Governor(cam.quality, cam.lores_size, target=TARGET_LATENCY)
+
+        # Video runs at camera rate on its own thread (and PUB socket), commands never wait for a frame.
+        video = threading.Thread(target=stream_video, args=(ser, cam, stop), daemon=True)
+        video.start()
+        print("[#]: Server ready! Waiting for clients...")
+
+        # Any number of clients, read-only requests are answered concurrently, the others one at a time.
+        asyncio.run(ser.serve(cam, governor, dispatcher, grasps, bus, loop))
 
     except KeyboardInterrupt:
         print('Exit due to keyboard interrupt')
@@ -47,4 +74,10 @@ if __name__ == "__main__":
         print('Python error with no Exception handler:')
         print('Traceback error:', ex)
     finally:
-        cam.__del__()
\ No newline at end of file
+        stop.set()
+        if grasps is not None:
+            grasps.stop()
+        if loop is not None:
+            loop.stop()
+        if cam is not None:
+            cam.close()
@@ -1,34 +1,241 @@
 import numpy as np
-import sys, cv2, time
+import sys, os, cv2, time, json
+from concurrent.futures import Future
 from imagezmq import SerializingContext
-from zmq import RCVTIMEO, SNDTIMEO, REQ
+from zmq import RCVTIMEO, SNDTIMEO, RCVHWM, LINGER, SUBSCRIBE, REQ, DEALER, SUB
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Pi Zero"))
+from protocol import SNAPSHOT, TELEMETRY, GRASP, COMMAND_PORT, VIDEO_PORT, EVENT_PORT, VIDEO_HWM, REQUEST_ID, parse_unchanged, parse_telemetry, parse_frame_msg, encode_command
+
+
+REPLY_TIMEOUT = 5.0     # Seconds to wait for the reply to a command.
 
 
 class Client():
+    """Command channel (REQ or DEALER) and video stream (SUB) to the Pi Zero.
+
+    Commands are answered without waiting for a frame and frames arrive at camera rate without
+    waiting for a command. Each socket must be used from a single thread.
 
-    def __init__(self):
+    With window > 1 commands go over a DEALER socket, tagged with a request id: submit() sends a
+    command and returns a Future at once, up to 'window' commands are in flight, and replies are
+    matched to their futures by receive_replies(). A burst of commands then costs one network RTT
+    instead of one each, and throughput is bound by how fast the Pi runs them.
+    """
+
+    def __init__(self, host="zero.local", window=1):
+        """
+        Arguments:
+          host:   Pi Zero address.
+          window: commands in flight at most, 1 for plain request/reply (REQ).
+        """
         context = SerializingContext()
-        self.socket = context.socket(socket_type=REQ)     # REQ (REQUEST) socket for sending requests
-        self.socket.connect("tcp://zero.local:5555")
-        self.socket.setsockopt(RCVTIMEO, 5000)          # Receive timeout in milliseconds
-        self.socket.setsockopt(SNDTIMEO, 5000)          # Send timeout in milliseconds
+        self.window = window
+        if window > 1:
+            self.socket = context.socket(socket_type=DEALER)  # DEALER socket for pipelined requests
+            self.socket.setsockopt(LINGER, 0)
+        else:
+            self.socket = context.socket(socket_type=REQ)     # REQ (REQUEST) socket for sending requests
+        self.socket.connect(f"tcp://{host}:{COMMAND_PORT}")
+        self.socket.setsockopt(RCVTIMEO, int(REPLY_TIMEOUT * 1000))   # Receive timeout in milliseconds
+        self.socket.setsockopt(SNDTIMEO, int(REPLY_TIMEOUT * 1000))   # Send timeout in milliseconds
+
+        self.next_id = 0
+        self.pending = {}       # request id -> (future, sent_at) of the commands in flight (DEALER).
+
+        self.video = context.socket(socket_type=SUB)    # SUB socket for the preview frames
+        self.video.setsockopt(RCVHWM, VIDEO_HWM)
+        self.video.setsockopt(LINGER, 0)
+        self.video.setsockopt(SUBSCRIBE, b"")
+        self.video.connect(f"tcp://{host}:{VIDEO_PORT}")
+
+        self.events = context.socket(socket_type=SUB)   # SUB socket for progress events (grasps)
+        self.events.setsockopt(LINGER, 0)
+        self.events.setsockopt(SUBSCRIBE, b"")
+        self.events.connect(f"tcp://{host}:{EVENT_PORT}")
+
+        self.sent_at = 0.0
+        self.decode_t = 0.0     # Decode time of the last preview frame.
+        self.base_delay = None  # Shortest (arrival - sent) of the preview frames: transfer over an idle link plus the clock offset.
+        self.stats = None       # Age and decode time of the last preview frame, reported with the next request.
+        self.last_img = None    # Last decoded preview frame, shown again when the server reports no change.
+        self.telemetry = None   # Newest motor telemetry, structured array of protocol.TELEMETRY_DTYPE (one record per motor).
 
         print("[#] Connecting to server...")
 
-    def send_msg(self, msg:str):
-        self.socket.send(msg.encode())
+    def send_msg(self, msg):
+        "Sends a text command or a binary one (see protocol.encode_command)."
+        msg = msg if isinstance(msg, bytes) else msg.encode()
+
+        if self.stats:
+            self.socket.send_multipart([msg, json.dumps(self.stats).encode()])
+            self.stats = None
+        else:
+            self.socket.send(msg)
+
+        self.sent_at = time.time()
 
-    def get_jpg(self) -> tuple[str, np.ndarray]:
-        """Receives a jpg buffer and a text msg.
+    def get_reply(self) -> str:
+        "Receives the text reply to the last command (and the telemetry sent with it, see set_telemetry)."
+        frames = self.socket.recv_multipart()
+        if len(frames) > 1:
+            self.set_telemetry(frames[1])
+        return frames[0].decode()
 
-        Receives a jpg bytestring of an OpenCV image.
-        Also receives a text msg, often the image name.
+    def set_telemetry(self, payload):
+        "Keeps the telemetry in 'payload' as self.telemetry, unless it is older than the current one."
+        telemetry = parse_telemetry(payload)
+        if telemetry is None or not len(telemetry):
+            return
+
+        if self.telemetry is None or not len(self.telemetry) or telemetry["timestamp"][0] >= self.telemetry["timestamp"][0]:
+            self.telemetry = telemetry
+
+    def send_command(self, command) -> str:
+        "Sends a command and returns its reply."
+        if self.window > 1:
+            return self.wait(self.submit(command))
+
+        self.send_msg(command)
+        return self.get_reply()
+
+    def submit(self, command) -> Future:
+        """Sends a command (text or binary) without waiting for its reply (window > 1).
+
+        If 'window' commands are already in flight, waits for a reply first.
 
         Returns:
-          msg: image name or text message.
-          img: cv2 image.
+          future: resolved by receive_replies() with the reply text, or (msg, jpg bytes) for a snapshot.
         """
-        msg, img_bytes = self.socket.recv_jpg()
+        while len(self.pending) >= self.window:
+            self.receive_replies(0.05)
+
+        self.next_id = self.next_id % 0xFFFFFFFF + 1
+        frames = [REQUEST_ID.pack(self.next_id), b"", command if isinstance(command, bytes) else command.encode()]
+        if self.stats:
+            frames.append(json.dumps(self.stats).encode())
+            self.stats = None
+
+        future = Future()
+        self.socket.send_multipart(frames)
+        self.pending[self.next_id] = (future, time.time())
+
+        return future
+
+    def receive_replies(self, timeout:float=0.0) -> int:
+        """Resolves the futures of the replies received so far, waiting up to 'timeout' seconds for
+        the first one. Commands without a reply for REPLY_TIMEOUT fail with TimeoutError.
+
+        Returns:
+          received: number of replies received.
+        """
+        received = 0
+        while self.socket.poll(0 if received else timeout * 1000):
+            frames = self.socket.recv_multipart()
+            entry = self.pending.pop(REQUEST_ID.unpack(frames[0])[0], None)
+            if entry is None:
+                continue    # Late reply to a command that already timed out.
+
+            future, _ = entry
+            body = frames[2:]
+            if len(body) == 2 and parse_telemetry(body[1]) is None:     # send_jpg reply: metadata and JPEG.
+                future.set_result((json.loads(body[0])["msg"], body[1]))
+            else:
+                if len(body) == 2:
+                    self.set_telemetry(body[1])
+                future.set_result(body[0].decode())
+            received += 1
+
+        now = time.time()
+        for request_id, (future, sent_at) in list(self.pending.items()):
+            if now - sent_at > REPLY_TIMEOUT:
+                del self.pending[request_id]
+                future.set_exception(TimeoutError(f"No reply in {REPLY_TIMEOUT} s"))
+
+        return received
+
+    def wait(self, future:Future):
+        "Receives replies until 'future' is resolved and returns its result."
+        while not future.done():
+            self.receive_replies(0.05)
+
+        return future.result()
+
+    def run_grasp(self, name:str) -> str:
+        "Starts grasp macro 'name' on the Pi ('stop' stops it), its progress arrives through get_events()."
+        return self.send_command(f"{GRASP} {name}")
+
+    def get_events(self) -> list[dict]:
+        "Returns the progress events received since the last call."
+        events = []
+        while self.events.poll(0):
+            events.append(self.events.recv_json())
+        return events
+
+    def get_jpg(self, timeout:float=1.0) -> tuple[str, np.ndarray]:
+        """Receives the newest preview frame and its text msg.
+
+        Frames queued behind it are dropped, so a slow caller shows the latest frame instead of
+        falling behind. If the server published an unchanged frame marker, the last image is
+        returned again.
+
+        The age of a new frame when received, its age on the Pi plus how much longer than the fastest
+        frame so far it took to arrive (which cancels the offset between the two clocks), and its
+        decode time are reported to the quality governor with the next command.
+
+        Arguments:
+          timeout: seconds to wait for a frame.
+
+        Returns:
+          msg: frame description, None if no frame arrived within timeout.
+          img: cv2 image, None if no frame arrived within timeout.
+        """
+        if not self.video.poll(timeout * 1000):
+            return None, None
+
+        msg, img_bytes = self.video.recv_jpg()
+        while self.video.poll(0):
+            msg, img_bytes = self.video.recv_jpg()
+        arrived = time.time()
+
+        if parse_unchanged(img_bytes) is not None:
+            if self.last_img is None:
+                return msg, np.ones((480,640,3), np.uint8)
+            return msg, self.last_img.copy()    # Callers draw on the frame they get.
+
+        start = time.time()
+        img = self.decode_jpg(img_bytes)
+        self.decode_t = time.time() - start
+        self.last_img = img.copy()
+
+        times = parse_frame_msg(msg)
+        if times is not None:
+            age, sent = times
+            delay = arrived - sent
+            self.base_delay = delay if self.base_delay is None else min(self.base_delay, delay)
+            self.stats = {"age": age + delay - self.base_delay, "decode": self.decode_t}
+
+        return msg, img
+
+    def get_snapshot(self, path:str=None) -> tuple[str, np.ndarray]:
+        """Requests and receives a full resolution frame (the regular frames are the low resolution preview).
+
+        Arguments:
+          path: file to save the JPEG to, as received.
+        """
+        if self.window > 1:
+            msg, img_bytes = self.wait(self.submit(SNAPSHOT))
+        else:
+            self.send_msg(SNAPSHOT)
+            msg, img_bytes = self.socket.recv_jpg()
+
+        if path:
+            with open(path, "wb") as f:
+                f.write(img_bytes)
+
+        return msg, self.decode_jpg(img_bytes)
+
+    def decode_jpg(self, img_bytes) -> np.ndarray:
         # Decode the received JPEG image
         img = cv2.imdecode(np.frombuffer(img_bytes, dtype='uint8'), -1)
         
@@ -36,15 +243,18 @@ class Client():
         if img is None:
             print("Failed to decode image")
             img = np.ones((480,640,3), np.uint8)
-            return msg, img
+            return img
 
-        # Convert YUV420 to RGB
-        img_bgr = cv2.cvtColor(img, cv2.COLOR_YUV2BGR_I420)
+        # Greyscale JPEG of a raw YUV420 buffer (server without simplejpeg): convert it to BGR
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_YUV2BGR_I420)
             
-        return msg, img_bgr
+        return img
 
     def __del__(self):
         self.socket.close()
+        self.video.close()
+        self.events.close()
 
 if __name__ == "__main__":
     try:    
@@ -52,12 +262,14 @@ if __name__ == "__main__":
 
         while True:
             start = time.time()
-            cli.send_msg("Set motor 1 to 30 deg")
-            msg, img = cli.get_jpg()
+            msg = cli.send_command("get_motor_position()")
             rtt = time.time() - start
 
             print(f"Received message: {msg} (RTT: {rtt:.3f} s.)") 
-            cv2.imshow('Frame', img)
+
+            _, img = cli.get_jpg()
+            if img is not None:
+                cv2.imshow('Frame', img)
 
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
@@ -8,11 +8,10 @@ if __name__ == "__main__":
         while True:
             start = time.time()
 
-            msg = "get_mode()"
-
-            cli.send_msg(msg)
-            msg, img = cli.get_jpg()
-            cv2.imshow('Frame', img)
+            msg = cli.send_command("get_mode()")
+            _, img = cli.get_jpg()
+            if img is not None:
+                cv2.imshow('Frame', img)
             elapsed = time.time() - start
 
             print(f"Received message: {msg} (elapsed: {elapsed:.3f} s.)")
@@ -1,7 +1,7 @@
 import numpy as np
 import sys, cv2, time
-from client import Client
-from itertools import cycle
+from client import Client, SNAPSHOT, TELEMETRY, GRASP, encode_command
+from zmq import Poller, POLLIN
 
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
@@ -10,7 +10,7 @@ from PyQt5.QtWidgets import *
 
 
 class MainWindow(QMainWindow):
-    command_signal = pyqtSignal(str)
+    command_signal = pyqtSignal(bytes)
 
     L_AND_R = 1
     MIDDLE = 2
@@ -18,6 +18,9 @@ class MainWindow(QMainWindow):
     THUMB = 4
     HINCH = 0
 
+    # Pregrasp buttons run as grasp macros on the Pi.
+    GRASPS = {"Power Grasp": "power", "Tripode Grasp": "tripod", "Pinch Grasp": "pinch", "Close Fingers": "close"}
+
     style = """
         QMainWindow {
             background-color: rgb(40,40,40);
@@ -290,12 +293,12 @@ class MainWindow(QMainWindow):
             if self.zero_thread.color_percentage >= 0.10 and self.done == False:
                 pos = self.sliders[2].minimum() + 60
                 self.done = True
-                self.command_signal.emit(f"set_motor_position({pos}, [{2}])")
+                self.command_signal.emit(encode_command("set_motor_position", pos, [2]))
             elif self.zero_thread.color_percentage < 0.10 and self.done == True:
                 print(len(self.zero_thread.command))
                 pos = self.sliders[2].minimum()
                 self.done = False
-                self.command_signal.emit(f"set_motor_position({pos}, [{2}])")
+                self.command_signal.emit(encode_command("set_motor_position", pos, [2]))
 
         else:
             print(msg)
@@ -519,81 +522,27 @@ class MainWindow(QMainWindow):
     def do_pregrasp(self):
         btn = self.sender()
 
-        if btn.text() == "Power Grasp":
-            self.command_signal.emit(f"set_torque(0)")
-            self.command_signal.emit(f"set_mode(2)")
-            self.command_signal.emit(f"set_torque(1)")
-
-            # Close hinch
-            self.command_signal.emit(f"set_motor_pwm(35, {[self.HINCH]})")
-            self.command_signal.emit(f"set_motor_pwm(20, {[self.THUMB]})")
-
-            # close other fingers
-            self.command_signal.emit(f"set_motor_pwm(-40, {[self.L_AND_R]})")
-            self.command_signal.emit(f"set_motor_pwm(20, {[self.MIDDLE]})")
-            self.command_signal.emit(f"set_motor_pwm(20, {[self.INDEX]})")
-
-            # Close thumb:
-            # time.sleep(2)
-
-        elif btn.text() == "Tripode Grasp":
-            self.command_signal.emit(f"set_torque(0)")
-            self.command_signal.emit(f"set_mode(2)")
-            self.command_signal.emit(f"set_torque(1)")
-
-            # Close hinch
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.HINCH]})")
-
-            # close other fingers
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.MIDDLE]})")
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.INDEX]})")
-            
-            # Close thumb
-            time.sleep(2)
-            self.command_signal.emit(f"set_motor_pwm(20, {[self.THUMB]})")
-
-        elif btn.text() == "Pinch Grasp":
-            self.command_signal.emit(f"set_torque(0)")
-            self.command_signal.emit(f"set_mode(2)")
-            self.command_signal.emit(f"set_torque(1)")
-
-            # Close hinch
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.HINCH]})")
-
-            # close other fingers
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.INDEX]})")
-            
-            # Close thumb
-            time.sleep(2)
-            self.command_signal.emit(f"set_motor_pwm(20, {[self.THUMB]})")
+        # Grasps run on the Pi (Pi Zero/grasp.py): one command each, their delays do not block the GUI.
+        if btn.text() in self.GRASPS:
+            self.command_signal.emit(f"{GRASP} {self.GRASPS[btn.text()]}".encode())
 
         elif btn.text() == "Lateral pinch Grasp": ...
 
         elif btn.text() == "Open Fingers":
-            self.command_signal.emit(f"set_torque(0, {[self.L_AND_R, self.MIDDLE, self.INDEX, self.THUMB, self.HINCH]})")
-            self.command_signal.emit(f"set_mode(0, {[self.L_AND_R, self.MIDDLE, self.INDEX, self.THUMB, self.HINCH]})")
-            self.command_signal.emit(f"set_torque(1, {[self.L_AND_R, self.MIDDLE, self.INDEX, self.THUMB, self.HINCH]})")
-
-            self.command_signal.emit(f"set_motor_position({self.sliders[1].maximum()}, {[self.L_AND_R]})")
-            self.command_signal.emit(f"set_motor_position({self.sliders[2].minimum()}, {[self.MIDDLE]})")
-            self.command_signal.emit(f"set_motor_position({self.sliders[3].minimum()}, {[self.INDEX]})")
-            self.command_signal.emit(f"set_motor_position({self.sliders[4].minimum()}, {[self.THUMB]})")
-            self.command_signal.emit(f"set_motor_position({self.sliders[0].minimum()}, {[self.HINCH]})")
+            self.command_signal.emit(f"{GRASP} stop".encode())
 
-        elif btn.text() == "Close Fingers":
-            self.command_signal.emit(f"set_torque(0, {[self.L_AND_R, self.MIDDLE, self.INDEX]})")
-            self.command_signal.emit(f"set_mode(2, {[self.L_AND_R, self.MIDDLE, self.INDEX]})")
-            self.command_signal.emit(f"set_torque(1, {[self.L_AND_R, self.MIDDLE, self.INDEX]})")
+            # Torque off, position mode and torque on for the whole hand: one command, 3 Bulk Write packets.
+            fingers = [self.L_AND_R, self.MIDDLE, self.INDEX, self.THUMB, self.HINCH]
+            self.command_signal.emit(encode_command("switch_mode", 0, fingers))
 
-            self.command_signal.emit(f"set_motor_pwm(-40, {[self.L_AND_R]})")
-            self.command_signal.emit(f"set_motor_pwm(30, {[self.MIDDLE]})")
-            self.command_signal.emit(f"set_motor_pwm(40, {[self.INDEX]})")
+            open_position = [self.sliders[1].maximum(), self.sliders[2].minimum(), self.sliders[3].minimum(), self.sliders[4].minimum(), self.sliders[0].minimum()]
+            self.command_signal.emit(encode_command("set_sync_motor_position", open_position, fingers))
 
         elif btn.text() == "Start Torque":
-            self.command_signal.emit(f"set_torque(1)")
+            self.command_signal.emit(encode_command("set_torque", 1))
         
         elif btn.text() == "Stop Torque":
-            self.command_signal.emit(f"set_torque(0)")
+            self.command_signal.emit(encode_command("set_torque", 0))
             
     def slider_changed(self, value):
         slider = self.sender()
@@ -601,9 +550,9 @@ class MainWindow(QMainWindow):
 
         self.edits[id].setText(str(value))
         if id < 5:
-            self.command_signal.emit(f"set_motor_position({value}, [{id}])")
+            self.command_signal.emit(encode_command("set_motor_position", value, [id]))
         else:
-            self.command_signal.emit(f"set_motor_velocity({value}, [{id-5}])")
+            self.command_signal.emit(encode_command("set_motor_velocity", value, [id-5]))
 
     def slider_text_changed(self):
         edit = self.sender()
@@ -627,15 +576,13 @@ class MainWindow(QMainWindow):
         mode = btn.property("mode")
 
         if mode == "off": # Enable torque!.
-            self.command_signal.emit(f"set_torque(1, [{motor_id}])")
+            self.command_signal.emit(encode_command("set_torque", 1, [motor_id]))
 
         elif btn_pos and mode == "pos" or not btn_pos and mode == "vel": # Disable torque.
-            self.command_signal.emit(f"set_torque(0, [{motor_id}])")
+            self.command_signal.emit(encode_command("set_torque", 0, [motor_id]))
 
         elif btn_pos and mode == "vel" or not btn_pos and mode == "pos": # Switch velocity/position mode:
-            self.command_signal.emit(f"set_torque(0, [{motor_id}])")
-            self.command_signal.emit(f"set_mode({int(not btn_pos)}, [{motor_id}])")
-            self.command_signal.emit(f"set_torque(1, [{motor_id}])")
+            self.command_signal.emit(encode_command("switch_mode", int(not btn_pos), [motor_id]))
 
     def setup_menubar(self, menu_layout):
 
@@ -674,6 +621,11 @@ class MainWindow(QMainWindow):
         self.colorLabel.mousePressEvent = lambda _: self.toggle_color_detection()
         menu_layout.addWidget(self.colorLabel)
 
+        # Option for saving a full resolution frame:
+        self.snapshotLabel = QLabel('Snapshot', self, objectName="menuBar_button")
+        self.snapshotLabel.mousePressEvent = lambda _: self.zero_thread.set_command(SNAPSHOT)
+        menu_layout.addWidget(self.snapshotLabel)
+
     def settings_actions(self):
         button = self.sender()
         parent = self.sender().parent()
@@ -714,40 +666,65 @@ class MainWindow(QMainWindow):
 class Zero_Thread(QThread, Client):
     DataUpdate = pyqtSignal(str, np.ndarray)
 
+    WINDOW = 8      # Commands in flight at most, a slider burst or a pregrasp pays one RTT instead of one each.
+
     def __init__(self):
-        super().__init__()
+        super().__init__(window=self.WINDOW)
         self.ThreadActive = False
         self.command = []
         self.motors = [{"position": '0', "torque": 0, "mode": 0, "load": 0} for _ in range(5)]
-        # self.ctrl_func = cycle([self.update_motor_positions, self.update_motor_torques, self.update_motor_loads, self.update_motor_modes])
-        self.ctrl_func = cycle([self.update_motor_positions, self.update_motor_loads, self.update_motor_torques, self.update_motor_loads, self.update_motor_modes, self.update_motor_loads])
         self.color_percentage = 0
         self.do_detection = False
+        self.last_msg = ""
+        self.loop_stats = {}    # Control loop timing published by the Pi.
 
     def run(self):
+        """Sends the queued commands and the periodic status requests without waiting for their
+        replies (up to WINDOW in flight), handles the replies as they come back and shows the preview
+        frames as they arrive."""
         self.ThreadActive = True
         timer = 0
 
+        poller = Poller()
+        poller.register(self.socket, POLLIN)
+        poller.register(self.video, POLLIN)
+        poller.register(self.events, POLLIN)
+
         while self.ThreadActive:
 
+            # Every reply carries telemetry, this keeps it coming while no command is sent.
             if time.time() - timer >=0.25:
-                next(self.ctrl_func)()
+                self.submit(TELEMETRY)
                 timer = time.time()
-            else:
-                start = time.time()
 
-                if self.command:
-                    command = self.command.pop(0)
-                else:
-                    command = ""
+            while self.command and len(self.pending) < self.window:
+                self.do_command(self.command.pop(0))
 
-                msg, img = self.do_command(command)
+            # Do not hold queued commands back waiting for a reply or a frame.
+            events = dict(poller.poll(0 if self.command else 20))
+            if events.get(self.socket) or self.pending:
+                self.receive_replies()      # Also expires lost replies.
+                self.update_motors()
 
-                elapsed = time.time() - start
+            if events.get(self.events):
+                for event in self.get_events():
+                    if "grasp" in event:
+                        self.last_msg = f"Grasp '{event['grasp']}' {event['state']} ({event['step']}/{event['steps']}) {event['detail']}"
+                    elif "loop" in event:
+                        self.loop_stats = event["loop"]
 
-                msg = f"Received message: {msg} (elapsed: {elapsed:.3f} s.)"
+            if not events.get(self.video):
+                continue
 
-                self.DataUpdate.emit(msg, img)
+            frame_msg, img = self.get_jpg(timeout=0)
+            if img is None:
+                continue
+
+            if self.do_detection:
+                img = self.detect_color(img)
+
+            loop = f" [loop jitter max: {self.loop_stats['jitter_max']:.2f} ms, overruns: {self.loop_stats['overruns']}]" if self.loop_stats else ""
+            self.DataUpdate.emit(f"{self.last_msg} [{frame_msg}]{loop}", img)
 
         self.stop()
 
@@ -756,64 +733,36 @@ class Zero_Thread(QThread, Client):
         self.quit()
 
     def do_command(self, command = ""):
-        self.send_msg(command)
-        msg, img_bgr = self.get_jpg()
+        start = time.time()
 
-        if self.do_detection:
-            img_bgr = self.detect_color(img_bgr)
+        if command == SNAPSHOT:
+            msg, _ = self.get_snapshot(f"snapshot_{time.strftime('%Y%m%d_%H%M%S')}.jpg")
+            self.last_msg = f"Received message: {msg} (elapsed: {time.time() - start:.3f} s.)"
+        else:
+            self.submit(command).add_done_callback(lambda future: self.show_reply(future, start))
 
-        return  msg, img_bgr
+    def show_reply(self, future, start):
+        msg = future.exception() or future.result()
+        self.last_msg = f"Received message: {msg} (elapsed: {time.time() - start:.3f} s.)"
 
-    def set_command(self, command:str):
+    def set_command(self, command):
         if len(self.command) > 10:
             self.command[-1] = command
         else:
             self.command.append(command)
 
-    def update_motor_positions(self):
-        msg, img = self.do_command("get_motor_position()")
-
-        str_positions = msg[1:msg.index("]")]
-        positions = str_positions.split(",")
-
-        for i, pos in enumerate(positions):
-            self.motors[i]["position"] = pos
-
-        self.DataUpdate.emit(msg,img)
-
-    def update_motor_torques(self):
-        msg, img = self.do_command("get_torque()")
-
-        str_torques = msg[1:msg.index("]")]
-        torques = str_torques.split(",")
-
-        for i, torque in enumerate(torques):
-            self.motors[i]["torque"] = int(torque)
-
-        self.DataUpdate.emit(msg,img)
-
-    def update_motor_loads(self):
-        msg, img = self.do_command("get_load()")
-
-        str_loads = msg[1:msg.index("]")]
-        loads = str_loads.split(",")
-
-        for i, load in enumerate(loads):
-            self.motors[i]["load"] = float(load)
-
-        self.DataUpdate.emit(msg,img)
-
-    def update_motor_modes(self):
-        msg, img = self.do_command("get_mode()")
-
-        str_modes = msg[1:msg.index("]")]
-        modes = str_modes.split(",")
-
-        for i, mode in enumerate(modes):
-            self.motors[i]["mode"] = int(mode)
-
-
-        self.DataUpdate.emit(msg, img)
+    def update_motors(self):
+        "Copies the newest telemetry (sent with every reply) into self.motors."
+        if self.telemetry is None:
+            return
+
+        for record in self.telemetry:
+            if record["id"] < len(self.motors):
+                motor = self.motors[record["id"]]
+                motor["position"]   = f"{record['position']:.2f}"
+                motor["torque"]     = int(record["torque"])
+                motor["mode"]       = int(record["mode"])
+                motor["load"]       = abs(float(record["load"]))     # Magnitude, as get_load() returns it.
 
     def detect_color(self, img):
         # Convert the image from BGR to HSV color space